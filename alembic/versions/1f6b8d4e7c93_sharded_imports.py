@@ -0,0 +1,39 @@
+"""sharded imports
+
+Revision ID: 1f6b8d4e7c93
+Revises: c47a9e1d3b25
+Create Date: 2025-12-08 14:05:12.774690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f6b8d4e7c93'
+down_revision: Union[str, Sequence[str], None] = 'c47a9e1d3b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('shards', sa.Integer(), nullable=True))
+    op.create_table('product_import_rows',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.PrimaryKeyConstraint('job_id', 'seq', 'sku'),
+    prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_import_rows')
+    op.drop_column('upload_jobs', 'shards')
@@ -0,0 +1,32 @@
+"""upload job checkpoints
+
+Revision ID: 2d7c5e9b1f08
+Revises: 6e0b3d7f9a52
+Create Date: 2026-01-08 16:34:02.911547
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7c5e9b1f08'
+down_revision: Union[str, Sequence[str], None] = '6e0b3d7f9a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('file_path', sa.String(length=512), nullable=True))
+    op.add_column('upload_jobs', sa.Column('checkpoint_offset', sa.BigInteger(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('checkpoint_rows', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'checkpoint_rows')
+    op.drop_column('upload_jobs', 'checkpoint_offset')
+    op.drop_column('upload_jobs', 'file_path')
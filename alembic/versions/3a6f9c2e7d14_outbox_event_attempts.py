@@ -0,0 +1,33 @@
+"""outbox event attempts
+
+Revision ID: 3a6f9c2e7d14
+Revises: 7b4e1a9c3d60
+Create Date: 2026-01-13 09:42:18.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a6f9c2e7d14'
+down_revision: Union[str, Sequence[str], None] = '7b4e1a9c3d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'outbox_events',
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column('outbox_events', sa.Column('last_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('outbox_events', 'last_error')
+    op.drop_column('outbox_events', 'attempts')
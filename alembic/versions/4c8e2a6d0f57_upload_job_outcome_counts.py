@@ -0,0 +1,34 @@
+"""upload job outcome counts
+
+Revision ID: 4c8e2a6d0f57
+Revises: b7d2f4a9c1e3
+Create Date: 2025-12-26 15:09:44.621375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e2a6d0f57'
+down_revision: Union[str, Sequence[str], None] = 'b7d2f4a9c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('inserted_rows', sa.Integer(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('updated_rows', sa.Integer(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('unchanged_rows', sa.Integer(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('skipped_rows', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'skipped_rows')
+    op.drop_column('upload_jobs', 'unchanged_rows')
+    op.drop_column('upload_jobs', 'updated_rows')
+    op.drop_column('upload_jobs', 'inserted_rows')
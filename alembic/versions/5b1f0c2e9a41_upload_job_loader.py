@@ -0,0 +1,28 @@
+"""upload job loader
+
+Revision ID: 5b1f0c2e9a41
+Revises: 37c54783ab01
+Create Date: 2025-12-02 10:14:03.512877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c2e9a41'
+down_revision: Union[str, Sequence[str], None] = '37c54783ab01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('loader', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'loader')
@@ -0,0 +1,30 @@
+"""upload job file format
+
+Revision ID: 6e0b3d7f9a52
+Revises: 9a3f6c1e8b24
+Create Date: 2026-01-05 09:53:17.204861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0b3d7f9a52'
+down_revision: Union[str, Sequence[str], None] = '9a3f6c1e8b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('file_format', sa.String(length=16), nullable=True))
+    op.add_column('upload_jobs', sa.Column('compression', sa.String(length=8), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'compression')
+    op.drop_column('upload_jobs', 'file_format')
@@ -0,0 +1,32 @@
+"""upload job profile
+
+Revision ID: 7b4e1a9c3d60
+Revises: 2d7c5e9b1f08
+Create Date: 2026-01-12 10:21:47.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e1a9c3d60'
+down_revision: Union[str, Sequence[str], None] = '2d7c5e9b1f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'upload_jobs',
+        sa.Column('profile', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'profile')
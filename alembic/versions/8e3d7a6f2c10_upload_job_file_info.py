@@ -0,0 +1,30 @@
+"""upload job file size and hash
+
+Revision ID: 8e3d7a6f2c10
+Revises: 5b1f0c2e9a41
+Create Date: 2025-12-04 16:40:51.208334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3d7a6f2c10'
+down_revision: Union[str, Sequence[str], None] = '5b1f0c2e9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('file_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'file_hash')
+    op.drop_column('upload_jobs', 'file_size')
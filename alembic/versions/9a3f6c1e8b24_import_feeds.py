@@ -0,0 +1,50 @@
+"""import feeds
+
+Revision ID: 9a3f6c1e8b24
+Revises: 4c8e2a6d0f57
+Create Date: 2025-12-29 10:16:52.338107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3f6c1e8b24'
+down_revision: Union[str, Sequence[str], None] = '4c8e2a6d0f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_feeds',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_file_hash', sa.String(length=64), nullable=True),
+    sa.Column('last_job_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('feed_fingerprints',
+    sa.Column('feed', sa.String(length=64), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=False),
+    sa.Column('fingerprint', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('feed', 'sku')
+    )
+    op.add_column('upload_jobs', sa.Column('feed', sa.String(length=64), nullable=True))
+    op.add_column(
+        'upload_jobs',
+        sa.Column('deactivate_missing', sa.Boolean(), server_default='false', nullable=False),
+    )
+    op.add_column('upload_jobs', sa.Column('deactivated_rows', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'deactivated_rows')
+    op.drop_column('upload_jobs', 'deactivate_missing')
+    op.drop_column('upload_jobs', 'feed')
+    op.drop_table('feed_fingerprints')
+    op.drop_table('import_feeds')
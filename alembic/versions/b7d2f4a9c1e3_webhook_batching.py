@@ -0,0 +1,30 @@
+"""webhook batching
+
+Revision ID: b7d2f4a9c1e3
+Revises: f0c4d8a2e6b1
+Create Date: 2025-12-23 10:41:06.517208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2f4a9c1e3'
+down_revision: Union[str, Sequence[str], None] = 'f0c4d8a2e6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhooks', sa.Column('batch_window_seconds', sa.Integer(), nullable=True))
+    op.add_column('webhooks', sa.Column('batch_max_events', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('webhooks', 'batch_max_events')
+    op.drop_column('webhooks', 'batch_window_seconds')
@@ -0,0 +1,31 @@
+"""upload job processed bytes
+
+Revision ID: c47a9e1d3b25
+Revises: 8e3d7a6f2c10
+Create Date: 2025-12-05 09:22:37.940126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e1d3b25'
+down_revision: Union[str, Sequence[str], None] = '8e3d7a6f2c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'upload_jobs',
+        sa.Column('processed_bytes', sa.BigInteger(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('upload_jobs', 'processed_bytes')
@@ -0,0 +1,34 @@
+"""webhook event type expression index
+
+Revision ID: e5a1c9d3b7f2
+Revises: d2e8b7c4f5a6
+Create Date: 2025-12-18 10:03:44.618205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9d3b7f2'
+down_revision: Union[str, Sequence[str], None] = 'd2e8b7c4f5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_webhooks_enabled_event_type',
+        'webhooks',
+        [sa.text('lower(event_type)')],
+        unique=False,
+        postgresql_where=sa.text('enabled IS true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhooks_enabled_event_type', table_name='webhooks')
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+import redis
+
+from app.config import (
+    PRODUCT_CACHE_MAX_ENTRY_BYTES,
+    PRODUCT_CACHE_TTL,
+    READ_YOUR_WRITES_SECONDS,
+)
+from app.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+# Unix time of the last version bump
+CATALOG_BUMPED_AT_KEY = "catalog:bumped_at"
+CACHE_STATS_KEY = "product_cache:stats"
+LISTING_KEY_PREFIX = "product_list:"
+
+# Read the catalog version, look up the entry for that version and count the
+# hit/miss in a single round trip.
+_LOOKUP_LUA = """
+    local version = redis.call('GET', KEYS[1]) or '0'
+    local entry = redis.call('GET', ARGV[1] .. version .. ':' .. ARGV[2])
+    if entry then
+        redis.call('HINCRBY', KEYS[2], 'hits', 1)
+    else
+        redis.call('HINCRBY', KEYS[2], 'misses', 1)
+    end
+    return {version, entry}
+    """
+_ASYNC_LOOKUP_SCRIPT = async_redis_client.register_script(_LOOKUP_LUA)
+
+
+def _params_digest(params: dict) -> str:
+    raw = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+async def get_cached_listing_async(params: dict) -> tuple[Optional[int], Optional[str]]:
+    """
+    Return (catalog_version, cached_json) for normalized listing params.
+
+    cached_json is None on a miss; the version is what a fresh result should
+    be stored under. Both are None if Redis is unavailable.
+    """
+    try:
+        result = await _ASYNC_LOOKUP_SCRIPT(
+            keys=[CATALOG_VERSION_KEY, CACHE_STATS_KEY],
+            args=[LISTING_KEY_PREFIX, _params_digest(params)],
+        )
+    except redis.RedisError as exc:
+        logger.warning("Product cache lookup failed: %r", exc)
+        return None, None
+    return _lookup_result(result)
+
+
+def _lookup_result(result: list) -> tuple[int, Optional[str]]:
+    version = int(result[0])
+    entry = result[1] if len(result) > 1 else None
+    return version, entry
+
+
+async def store_listing_async(params: dict, version: int, body: str, from_replica: bool = False):
+    """
+    Cache a listing response under the version it was computed for.
+
+    A listing read from the replica right after a write may predate it, yet
+    would be cached under the new version; it's only stored once the catalog
+    has been stable for READ_YOUR_WRITES_SECONDS.
+    """
+    if len(body) > PRODUCT_CACHE_MAX_ENTRY_BYTES:
+        return
+    try:
+        if from_replica:
+            bumped_at = await async_redis_client.get(CATALOG_BUMPED_AT_KEY)
+            if bumped_at and time.time() - float(bumped_at) < READ_YOUR_WRITES_SECONDS:
+                return
+        await async_redis_client.set(_listing_key(params, version), body, ex=PRODUCT_CACHE_TTL)
+    except redis.RedisError as exc:
+        logger.warning("Product cache store failed: %r", exc)
+
+
+def _listing_key(params: dict, version: int) -> str:
+    return f"{LISTING_KEY_PREFIX}{version}:{_params_digest(params)}"
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached listing. Call after a product write commits.
+
+    Old entries are simply never looked up again and expire with their TTL.
+    """
+    try:
+        pipe = redis_client.pipeline()
+        pipe.incr(CATALOG_VERSION_KEY)
+        pipe.set(CATALOG_BUMPED_AT_KEY, time.time())
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not bump catalog version: %r", exc)
+
+
+def cache_stats() -> dict:
+    pipe = redis_client.pipeline()
+    pipe.hgetall(CACHE_STATS_KEY)
+    pipe.get(CATALOG_VERSION_KEY)
+    stats, version = pipe.execute()
+    hits = int(stats.get("hits", 0))
+    misses = int(stats.get("misses", 0))
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "catalog_version": int(version or 0),
+    }
@@ -1,6 +1,17 @@
+import os
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import multiprocess, start_http_server
 
-from app.config import REDIS_URL
+from app.config import (
+    BROKER_VISIBILITY_TIMEOUT,
+    OUTBOX_RELAY_INTERVAL,
+    REDIS_URL,
+    WORKER_METRICS_PORT,
+)
+from app.metrics import QueueDepthCollector, metrics_registry
+from app.redis_client import redis_client
 
 celery_app = Celery(
     "product_importer",
@@ -12,7 +23,41 @@ celery_app.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
+    broker_transport_options={"visibility_timeout": BROKER_VISIBILITY_TIMEOUT},
+    beat_schedule={
+        "relay-outbox": {
+            "task": "app.tasks.outbox.relay_outbox",
+            "schedule": OUTBOX_RELAY_INTERVAL,
+            # Skip runs that couldn't start in time rather than piling them up
+            "options": {"expires": OUTBOX_RELAY_INTERVAL * 5},
+        },
+    },
 )
 
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """
+    Serve Prometheus metrics from the worker's main process.
+
+    Tasks run in forked pool processes, so their metrics only reach this
+    exporter when PROMETHEUS_MULTIPROC_DIR is set (see app.metrics).
+    """
+    if not WORKER_METRICS_PORT:
+        return
+    registry = metrics_registry()
+    queues = [q.name for q in celery_app.amqp.queues.values()] or [
+        celery_app.conf.task_default_queue
+    ]
+    registry.register(QueueDepthCollector(redis_client, queues))
+    start_http_server(WORKER_METRICS_PORT, registry=registry)
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
 # Import tasks so Celery knows about them
-from app.tasks import import_products, webhooks  # noqa: F401
+from app.tasks import delete_products, import_products, outbox, webhooks  # noqa: F401
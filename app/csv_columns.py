@@ -0,0 +1,211 @@
+import json
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional
+
+from app.config import IMPORT_COLUMN_ALIASES
+
+FIELDS = ("sku", "name", "description", "price")
+REQUIRED_FIELDS = ("sku", "name")
+
+# Header names accepted for each field, compared case-insensitively after
+# trimming. IMPORT_COLUMN_ALIASES adds to these.
+DEFAULT_ALIASES = {
+    "sku": ("sku", "product_sku", "item_sku"),
+    "name": ("name", "product_name", "title"),
+    "description": ("description", "desc", "product_description"),
+    "price": ("price", "unit_price"),
+}
+
+# Plain decimals that fit products.price, numeric(10, 2): at most 8 integer
+# digits once leading zeros are dropped (captured, see _price_fits).
+_PRICE_RE = re.compile(r"[+-]?(?=\.?\d)0*(\d{0,8})(?:\.\d*)?")
+# Anything numeric, exponents included. Numbers _PRICE_RE rejects ("1e30",
+# "123456789") would overflow the column and fail the whole batch, so their
+# rows are skipped; other values (empty, "N/A", "NaN", "$5") become NULL.
+_NUMBER_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_PRICE_LIMIT = Decimal("100000000")
+_CENTS = Decimal("0.01")
+
+
+def _price_fits(price: str) -> bool:
+    """Whether an 8-integer-digit price still fits after rounding to cents."""
+    return abs(Decimal(price).quantize(_CENTS, rounding=ROUND_HALF_UP)) < _PRICE_LIMIT
+
+
+class ColumnMapping:
+    """
+    Which CSV column holds each product field, resolved once per file.
+
+    Header names are matched case-insensitively against the aliases; a field
+    that isn't present maps to None. The first matching column wins.
+    """
+
+    def __init__(
+        self,
+        header: list[str],
+        aliases: Optional[dict] = None,
+        required: tuple[str, ...] = REQUIRED_FIELDS,
+    ):
+        aliases = aliases or column_aliases()
+        positions: dict[str, int] = {}
+        for i, raw in enumerate(header):
+            positions.setdefault(raw.strip().lower(), i)
+
+        self.header = header
+        self.index: dict[str, Optional[int]] = {}
+        for field in FIELDS:
+            self.index[field] = next(
+                (positions[a] for a in aliases[field] if a in positions), None
+            )
+
+        missing = [f for f in required if self.index[f] is None]
+        if missing:
+            raise ValueError(
+                f"CSV header has no column for: {', '.join(missing)} (header: {header})"
+            )
+
+        present = [f for f in FIELDS if self.index[f] is not None]
+        # Rows shorter than this are padded with empty cells
+        self.min_width = max((self.index[f] for f in present), default=-1) + 1
+        # One getter per present field, so a column is a single map() in C
+        self.getters = {f: itemgetter(self.index[f]) for f in present}
+
+
+def column_aliases() -> dict[str, tuple[str, ...]]:
+    aliases = {}
+    for field in FIELDS:
+        extra = IMPORT_COLUMN_ALIASES.get(field, ())
+        aliases[field] = tuple(a.strip().lower() for a in (*DEFAULT_ALIASES[field], *extra))
+    return aliases
+
+
+class ColumnBatch:
+    """One batch of CSV rows, stored as a list of cells per field."""
+
+    __slots__ = ("sku", "name", "description", "price", "rows")
+
+    def __init__(self, rows: list[list[str]], mapping: ColumnMapping):
+        self.rows = len(rows)
+        width = mapping.min_width
+        if rows and min(map(len, rows)) < width:
+            for row in rows:
+                if len(row) < width:
+                    row.extend([""] * (width - len(row)))
+
+        for field in FIELDS:
+            getter = mapping.getters.get(field)
+            column = list(map(getter, rows)) if getter else [""] * len(rows)
+            setattr(self, field, column)
+
+
+def iter_column_batches(
+    reader: Iterable[list[str]], mapping: ColumnMapping, batch_size: int
+) -> Iterator[ColumnBatch]:
+    """
+    Group csv.reader rows into ColumnBatches of up to batch_size rows.
+
+    Rows are pulled with islice so the per-row loop stays in C; the reader
+    is never read past the end of the batch being yielded.
+    """
+    rows_iter = filter(None, reader)  # drop blank lines
+    while True:
+        rows = list(islice(rows_iter, batch_size))
+        if not rows:
+            return
+        yield ColumnBatch(rows, mapping)
+
+
+def iter_ndjson_batches(lines: Iterable[str], batch_size: int) -> Iterator[ColumnBatch]:
+    """
+    Group NDJSON lines (one JSON object per line) into ColumnBatches.
+
+    Keys go through the same alias matching as a CSV header, resolved once
+    per distinct key layout. Objects missing sku or name become invalid rows
+    rather than failing the file.
+    """
+    canonical = ColumnMapping(list(FIELDS))
+    mappings: dict[tuple, list[Optional[int]]] = {}
+    rows: list[list[str]] = []
+
+    for line in lines:
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError(f"NDJSON line is not an object: {line[:80]!r}")
+
+        keys = tuple(obj)
+        positions = mappings.get(keys)
+        if positions is None:
+            mapping = ColumnMapping(list(keys), required=())
+            positions = mappings[keys] = [mapping.index[f] for f in FIELDS]
+
+        values = list(obj.values())
+        rows.append([_cell(values[i]) if i is not None else "" for i in positions])
+        if len(rows) >= batch_size:
+            yield ColumnBatch(rows, canonical)
+            rows = []
+
+    if rows:
+        yield ColumnBatch(rows, canonical)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def normalize_sku(sku: str) -> str:
+    """SKUs are stored trimmed and upper-cased, which makes them case-insensitive."""
+    return sku.strip().upper()
+
+
+def normalize_batch(batch: ColumnBatch) -> tuple[list[dict], int]:
+    """
+    Turn a column batch into product values ready for an upsert.
+
+    - Normalize SKU to upper-case for case-insensitive uniqueness (as
+      normalize_sku does, but a column at a time).
+    - Rows without a SKU or name are skipped.
+    - Deduplicate by SKU so ON CONFLICT doesn't hit the same row twice in a
+      single statement; the last occurrence inside the batch wins.
+    - Prices that aren't numbers become NULL. Numbers written with an
+      exponent or too large for numeric(10, 2) skip the row. Valid ones stay
+      strings; Postgres parses them into the column itself, which is cheaper
+      than building a Decimal per row.
+
+    Returns the values and the number of rows skipped as invalid.
+    """
+    skus = list(map(str.upper, map(str.strip, batch.sku)))
+    names = list(map(str.strip, batch.name))
+    descriptions = list(map(str.strip, batch.description))
+    prices = list(map(str.strip, batch.price))
+    match = _PRICE_RE.fullmatch
+    is_number = _NUMBER_RE.fullmatch
+
+    items_by_sku: dict[str, dict] = {}
+    skipped = 0
+    for sku, name, description, price in zip(skus, names, descriptions, prices):
+        if not sku or not name:
+            skipped += 1
+            continue
+        valid = match(price)
+        if valid is None:
+            if is_number(price):
+                skipped += 1
+                continue
+            price = None
+        elif len(valid[1]) == 8 and not _price_fits(price):
+            skipped += 1
+            continue
+        items_by_sku[sku] = {
+            "sku": sku,
+            "name": name,
+            "description": description,
+            "price": price,
+        }
+    return list(items_by_sku.values()), skipped
@@ -0,0 +1,143 @@
+class CsvRecordCounter:
+    """
+    Count CSV records in a byte stream that arrives in chunks.
+
+    Newlines inside quoted fields (e.g. multi-line descriptions) don't end a
+    record. Quote state is tracked by parity, which also handles escaped
+    quotes ("") since they come in pairs.
+    """
+
+    def __init__(self):
+        self.newlines = 0
+        self.in_quotes = False
+        self._last_byte = b""
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+
+        if not self.in_quotes and b'"' not in chunk:
+            # Fast path: no quoting in play, every newline ends a record
+            self.newlines += chunk.count(b"\n")
+        else:
+            segments = chunk.split(b"\n")
+            for segment in segments[:-1]:
+                if segment.count(b'"') & 1:
+                    self.in_quotes = not self.in_quotes
+                if not self.in_quotes:
+                    self.newlines += 1
+            if segments[-1].count(b'"') & 1:
+                self.in_quotes = not self.in_quotes
+
+        self._last_byte = chunk[-1:]
+
+    @property
+    def records(self) -> int:
+        """Number of records seen so far, including the header."""
+        count = self.newlines
+        if self._last_byte and self._last_byte != b"\n":
+            # Final record without a trailing newline
+            count += 1
+        return count
+
+    @property
+    def data_rows(self) -> int:
+        """Number of records excluding the header row."""
+        return max(self.records - 1, 0)
+
+
+class OffsetLineReader:
+    """
+    Iterate decoded lines from a binary file while tracking the exact number
+    of bytes consumed.
+
+    csv.reader pulls one line at a time and never reads ahead, so after it
+    yields a row, `offset` is the byte position right after that row. That
+    makes it usable both for progress and as a resumable row boundary.
+    """
+
+    def __init__(self, raw, encoding: str = "utf-8", start: int = 0, end: int | None = None):
+        self.raw = raw
+        self.encoding = encoding
+        self.offset = start
+        self.end = end
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.end is not None and self.offset >= self.end:
+            raise StopIteration
+        line = self.raw.readline()
+        if not line:
+            raise StopIteration
+        if self.offset == 0 and line.startswith(b"\xef\xbb\xbf"):
+            # Excel likes to prefix UTF-8 CSVs with a BOM
+            line_text = line[3:].decode(self.encoding)
+        else:
+            line_text = line.decode(self.encoding)
+        self.offset += len(line)
+        return line_text
+
+    def seek(self, offset: int):
+        """
+        Continue reading from a row boundary recorded earlier via `offset`.
+
+        Works on decompressing streams too (GzipFile, ZipExtFile), which
+        seek forward by decompressing and discarding.
+        """
+        self.raw.seek(offset)
+        self.offset = offset
+
+
+def find_row_boundaries(path, start: int, parts: int, chunk_size: int = 1024 * 1024) -> list[int]:
+    """
+    Split the byte range [start, EOF) of a CSV file into up to `parts`
+    row-aligned ranges and return the offsets that separate them.
+
+    `start` must itself be a row boundary (e.g. the end of the header). The
+    file is scanned once, tracking quote parity so a newline inside a quoted
+    field is never picked as a split point. Chunks that don't contain a split
+    target are only counted for quotes, which keeps the scan in C.
+    """
+    size = path.stat().st_size
+    span = size - start
+    if parts <= 1 or span <= 0:
+        return []
+
+    targets = [start + span * i // parts for i in range(1, parts)]
+    boundaries: list[int] = []
+    in_quotes = False
+    pos = start
+
+    with path.open("rb") as f:
+        f.seek(start)
+        while targets:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk_end = pos + len(chunk)
+
+            if targets[0] >= chunk_end:
+                if chunk.count(b'"') & 1:
+                    in_quotes = not in_quotes
+                pos = chunk_end
+                continue
+
+            i = 0
+            while i < len(chunk):
+                nl = chunk.find(b"\n", i)
+                line_end = len(chunk) if nl == -1 else nl + 1
+                if chunk.count(b'"', i, line_end) & 1:
+                    in_quotes = not in_quotes
+                i = line_end
+                if nl == -1:
+                    break
+                boundary = pos + i
+                if not in_quotes and targets and boundary >= targets[0] and boundary < size:
+                    boundaries.append(boundary)
+                    while targets and targets[0] <= boundary:
+                        targets.pop(0)
+            pos = chunk_end
+
+    return boundaries
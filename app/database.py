@@ -1,11 +1,22 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from app.config import DATABASE_URL
+from app.config import (
+    ASYNC_DATABASE_URL,
+    ASYNC_DB_MAX_OVERFLOW,
+    ASYNC_DB_POOL_SIZE,
+    DATABASE_READ_URL,
+    DATABASE_URL,
+)
+from app.metrics import TimedAsyncQueuePool, TimedQueuePool
 
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
+    poolclass=TimedQueuePool,
+    pool_logging_name="primary",
 )
 
 SessionLocal = sessionmaker(
@@ -14,6 +25,61 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+
+def _async_url(url: str):
+    """DATABASE_URL for asyncpg, which spells libpq's sslmode as ssl."""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    sslmode = url.query.get("sslmode")
+    if sslmode:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url
+
+
+# Same database through asyncpg, for handlers that run on the event loop.
+# Engines are lazy, so nothing connects until the first request.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL or _async_url(DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=ASYNC_DB_POOL_SIZE,
+    max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    poolclass=TimedAsyncQueuePool,
+    pool_logging_name="primary_async",
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    # Objects stay readable after commit without a lazy load, which an
+    # AsyncSession can't do implicitly
+    expire_on_commit=False,
+)
+
+# Read replica engines, or the primary ones again when no replica is set
+if DATABASE_READ_URL:
+    read_engine = create_engine(
+        DATABASE_READ_URL,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_logging_name="replica",
+    )
+    async_read_engine = create_async_engine(
+        _async_url(DATABASE_READ_URL),
+        pool_pre_ping=True,
+        pool_size=ASYNC_DB_POOL_SIZE,
+        max_overflow=ASYNC_DB_MAX_OVERFLOW,
+        poolclass=TimedAsyncQueuePool,
+        pool_logging_name="replica_async",
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -24,3 +90,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """FastAPI dependency to get an async DB session, for `async def` handlers"""
+    async with AsyncSessionLocal() as db:
+        yield db
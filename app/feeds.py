@@ -0,0 +1,175 @@
+import hashlib
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import FeedFingerprint, ImportFeed, Product, UploadJob
+
+# SKUs per statement when deactivating or forgetting missing products
+_MISSING_CHUNK = 5000
+
+_CENTS = Decimal("0.01")
+
+
+def fingerprint(value: dict) -> int:
+    """
+    64-bit content hash of a product row (as a signed bigint).
+
+    Takes a normalized CSV row or a product's stored columns alike: the
+    price is rounded to cents the way products.price stores it. A price too
+    large to round (normalize_batch rejects those) is hashed as given.
+    """
+    price = value["price"]
+    if price is not None:
+        try:
+            price = Decimal(price).quantize(_CENTS, rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            pass
+    raw = "\x1f".join(
+        [value["name"], value["description"] or "", "" if price is None else str(price)]
+    )
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def feed_unchanged(db, job: UploadJob) -> bool:
+    """
+    True if the upload is byte-identical to the feed's last successful import
+    and the products that import wrote are all still there, unedited.
+    """
+    feed = db.get(ImportFeed, job.feed)
+    if feed is None or job.file_hash is None or feed.last_file_hash != job.file_hash:
+        return False
+    return FeedDiff.load(db, job.feed).drifted == 0
+
+
+class FeedDiff:
+    """
+    Diff an incoming feed against the products its previous import wrote.
+
+    The SKUs come from the feed's fingerprints, but each is compared with
+    the fingerprint of the product as it is now, so products deleted or
+    edited outside the feed are written again. All of them are held in
+    memory (roughly 100 bytes per SKU), so each row is checked without a
+    database round trip. Only rows that are new or whose content changed
+    are passed on to be written.
+    """
+
+    def __init__(self, name: str, fingerprints: dict[str, int | None], drifted: int = 0):
+        self.name = name
+        # None for a SKU whose product no longer exists
+        self.fingerprints = fingerprints
+        # SKUs whose product no longer matches what the feed last delivered
+        self.drifted = drifted
+        self.seen: set[str] = set()
+
+    @classmethod
+    def load(cls, db, name: str) -> "FeedDiff":
+        rows = db.execute(
+            select(
+                FeedFingerprint.sku,
+                FeedFingerprint.fingerprint,
+                Product.name,
+                Product.description,
+                Product.price,
+            )
+            .outerjoin(Product, Product.sku == FeedFingerprint.sku)
+            .where(FeedFingerprint.feed == name)
+            .execution_options(yield_per=50000)
+        )
+        fingerprints: dict[str, int | None] = {}
+        drifted = 0
+        for sku, delivered, product_name, description, price in rows:
+            current = None
+            if product_name is not None:
+                current = fingerprint(
+                    {"name": product_name, "description": description, "price": price}
+                )
+            fingerprints[sku] = current
+            drifted += current != delivered
+        return cls(name, fingerprints, drifted)
+
+    def changed(self, values: list[dict]) -> tuple[list[dict], list[str]]:
+        """
+        Return the new or changed rows of a normalized batch, plus the SKUs
+        among them that the feed didn't have before.
+        """
+        changed, new_skus = [], []
+        for v in values:
+            sku = v["sku"]
+            self.seen.add(sku)
+            fp = fingerprint(v)
+            previous = self.fingerprints.get(sku)
+            if previous != fp:
+                if previous is None:
+                    new_skus.append(sku)
+                self.fingerprints[sku] = fp
+                changed.append(v)
+        return changed, new_skus
+
+    def store(self, db, values: list[dict]):
+        """Record fingerprints for rows just written, in the caller's transaction."""
+        if not values:
+            return
+        stmt = insert(FeedFingerprint).values(
+            [
+                {"feed": self.name, "sku": v["sku"], "fingerprint": self.fingerprints[v["sku"]]}
+                for v in values
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FeedFingerprint.feed, FeedFingerprint.sku],
+            set_={"fingerprint": stmt.excluded.fingerprint},
+        )
+        db.execute(stmt)
+
+    def reactivate(self, db, skus: list[str]):
+        """Mark SKUs that (re)joined the feed as active again."""
+        if skus:
+            db.execute(
+                update(Product)
+                .where(Product.sku.in_(skus), Product.active.is_(False))
+                .values(active=True, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+
+    def deactivate_missing(self, db) -> int:
+        """
+        Deactivate products the feed had before but didn't send this time and
+        forget their fingerprints. Returns how many products were deactivated.
+        """
+        missing = [sku for sku in self.fingerprints if sku not in self.seen]
+        deactivated = 0
+        for i in range(0, len(missing), _MISSING_CHUNK):
+            chunk = missing[i : i + _MISSING_CHUNK]
+            result = db.execute(
+                update(Product)
+                .where(Product.sku.in_(chunk), Product.active.is_(True))
+                .values(active=False, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            deactivated += result.rowcount
+            db.execute(
+                delete(FeedFingerprint).where(
+                    FeedFingerprint.feed == self.name, FeedFingerprint.sku.in_(chunk)
+                )
+            )
+        return deactivated
+
+
+def record_feed_import(db, job: UploadJob):
+    """Remember the file hash of a successful feed import, in the caller's transaction."""
+    stmt = insert(ImportFeed).values(
+        name=job.feed, last_file_hash=job.file_hash, last_job_id=job.id
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ImportFeed.name],
+        set_={
+            "last_file_hash": stmt.excluded.last_file_hash,
+            "last_job_id": stmt.excluded.last_job_id,
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    db.execute(stmt)
@@ -0,0 +1,118 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.config import UPLOAD_DIR
+
+# cProfile dumps of opted-in jobs, one pstats file per job
+PROFILE_DIR = UPLOAD_DIR / "profiles"
+
+# Functions listed in a job's profile summary, by cumulative time
+PROFILE_TOP_FUNCTIONS = 25
+
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else None
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Resident set size of this process right now, in MiB (None off Linux).
+
+    ru_maxrss would be cheaper but is the peak over the whole life of a
+    reused worker process, so it would charge one job for an earlier one.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * _PAGE_MB
+
+
+class ImportProfile:
+    """
+    Where an import's time went, summed over its batches.
+
+    Phases come from the same PhaseTimer that feeds the Prometheus metrics:
+    parse, normalize, db (statements), commit and progress (Redis), plus
+    upload_write, measured by the API while it stores the file, setup and
+    feed around the batch loop, and merge for sharded imports.
+
+    Memory is sampled once per batch: peak_rss_mb is the highest RSS seen
+    during the job and rss_growth_mb how far that is above the RSS the job
+    started with.
+    """
+
+    def __init__(self, previous: Optional[dict] = None):
+        previous = previous or {}
+        self.phases: dict[str, float] = {}
+        upload_write = previous.get("phases", {}).get("upload_write")
+        if upload_write is not None:
+            self.phases["upload_write"] = upload_write
+        self.batches = 0
+        self.rows = 0
+        self.baseline_rss_mb = current_rss_mb()
+        self.peak_rss_mb = self.baseline_rss_mb
+        self.rss_growth_mb = 0.0 if self.baseline_rss_mb is not None else None
+        self.started = time.perf_counter()
+        self.extra: dict = {}
+
+    def add(self, phases: dict[str, float], rows: int = 0, batches: int = 1):
+        for phase, seconds in phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.rows += rows
+        self.batches += batches
+        self.sample_rss()
+
+    def sample_rss(self):
+        rss = current_rss_mb()
+        if rss is None or self.baseline_rss_mb is None:
+            return
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        self.rss_growth_mb = max(self.rss_growth_mb, rss - self.baseline_rss_mb)
+
+    def merge_rss(self, peak: Optional[float], growth: Optional[float]):
+        """Fold in the memory figures of a profile taken in another process."""
+        if peak is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, peak)
+        if growth is not None:
+            self.rss_growth_mb = max(self.rss_growth_mb or 0.0, growth)
+
+    def as_dict(self, elapsed: Optional[float] = None) -> dict:
+        """The profile as stored on the job; `elapsed` defaults to time since creation."""
+        if elapsed is None:
+            elapsed = time.perf_counter() - self.started
+        return {
+            "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+            "batches": self.batches,
+            "rows": self.rows,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+            "peak_rss_mb": _round_mb(self.peak_rss_mb),
+            "rss_growth_mb": _round_mb(self.rss_growth_mb),
+            **self.extra,
+        }
+
+
+def _round_mb(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def profile_path(job_id: int) -> Path:
+    return PROFILE_DIR / f"job-{job_id}.prof"
+
+
+def save_cprofile(profiler: cProfile.Profile, job_id: int) -> dict:
+    """Dump a job's cProfile data to disk and summarize its top functions."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = profile_path(job_id)
+    profiler.dump_stats(str(path))
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return {"file": path.name, "top_cumulative": out.getvalue()}
@@ -1,10 +1,14 @@
+import time
 from pathlib import Path
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from app.config import UPLOAD_MAX_BYTES
+from app.metrics import HTTP_REQUEST_SECONDS, metrics_registry, render_metrics
+from app.read_routing import tag_response
 from app.routers import uploads, products, webhooks
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,6 +19,51 @@ app = FastAPI(title="Product Importer")
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
+# Slack for multipart boundaries and form fields around the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from Content-Length before the body is read."""
+    if request.method == "POST" and request.url.path == "/api/uploads":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds the maximum upload size of {UPLOAD_MAX_BYTES} bytes"},
+            )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Send a client's reads to the primary for a moment after it writes (see app.read_routing)."""
+    response = await call_next(request)
+    tag_response(request, response)
+    return response
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe API latency per route template, so /products/{product_id} is one series."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None and request.url.path.startswith("/api"):
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path, str(response.status_code)
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics(metrics_registry())
+    return Response(content=body, media_type=content_type)
+
+
 # API routers
 app.include_router(uploads.router, prefix="/api")
 app.include_router(products.router, prefix="/api")
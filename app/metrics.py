@@ -0,0 +1,199 @@
+import logging
+import os
+import time
+
+import redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the API and the worker. With several processes per
+# service (Celery prefork, multiple uvicorn workers) set
+# PROMETHEUS_MULTIPROC_DIR to an empty directory shared by them; each
+# exporter then reports the sum over all processes.
+
+# Latency buckets (seconds) for per-batch import work
+_BATCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency until the response starts, per route template",
+    ["method", "route", "status"],
+)
+
+IMPORT_ROWS = Counter("import_rows_total", "CSV/NDJSON rows read by imports", ["loader"])
+IMPORT_BATCHES = Counter("import_batches_total", "Import batches committed", ["loader"])
+IMPORT_PHASE_SECONDS = Histogram(
+    "import_batch_phase_seconds",
+    "Time spent per import batch in each phase (parse, normalize, db, commit)",
+    ["loader", "phase"],
+    buckets=_BATCH_BUCKETS,
+)
+IMPORT_WRITE_SECONDS = Histogram(
+    "import_write_batch_seconds",
+    "Latency of one batch upsert (_upsert_batch / _copy_batch)",
+    ["loader"],
+    buckets=_BATCH_BUCKETS,
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative: unused capacity)",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+WEBHOOK_DELIVERY_SECONDS = Histogram(
+    "webhook_delivery_seconds",
+    "Webhook POST latency, including connection setup",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+WEBHOOK_DELIVERIES = Counter(
+    "webhook_deliveries_total", "Webhook deliveries by response status code", ["status"]
+)
+
+
+class PhaseTimer:
+    """
+    Accumulate wall time per phase with one perf_counter() call per mark.
+
+    `mark(phase)` charges the time since the previous mark to `phase`, so a
+    loop only needs a mark at the end of each step.
+    """
+
+    __slots__ = ("phases", "_last")
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        return elapsed
+
+    def take(self) -> dict[str, float]:
+        """Return the phases so far and start over (the clock keeps running)."""
+        phases, self.phases = self.phases, {}
+        return phases
+
+
+def record_import_batch(loader: str, rows: int, phases: dict[str, float]):
+    IMPORT_ROWS.labels(loader).inc(rows)
+    IMPORT_BATCHES.labels(loader).inc()
+    for phase, seconds in phases.items():
+        IMPORT_PHASE_SECONDS.labels(loader, phase).observe(seconds)
+
+
+def record_webhook_results(results: list[dict]):
+    for r in results:
+        status = str(r["status_code"]) if r["status_code"] is not None else "error"
+        WEBHOOK_DELIVERIES.labels(status).inc()
+        outcome = "ok" if r["status_code"] is not None and r["status_code"] < 400 else "failed"
+        WEBHOOK_DELIVERY_SECONDS.labels(outcome).observe(r["duration_ms"] / 1000)
+
+
+# ----- Connection pools -----
+
+
+class _TimedCheckout:
+    """Pool mixin: time checkout waits and track checked-out/overflow counts."""
+
+    def _pool_label(self) -> str:
+        return getattr(self, "logging_name", None) or "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            label = self._pool_label()
+            DB_POOL_CHECKOUT_SECONDS.labels(label).observe(time.perf_counter() - start)
+            DB_POOL_CHECKED_OUT.labels(label).set(self.checkedout())
+            DB_POOL_OVERFLOW.labels(label).set(self.overflow())
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        label = self._pool_label()
+        DB_POOL_CHECKED_OUT.labels(label).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(label).set(self.overflow())
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+# ----- Exposition -----
+
+
+def metrics_registry() -> CollectorRegistry:
+    """The registry to expose: all processes' metrics in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics(registry: CollectorRegistry) -> tuple[bytes, str]:
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class QueueDepthCollector:
+    """Celery queue lengths, read from the Redis broker at scrape time."""
+
+    def __init__(self, redis_client, queues: list[str]):
+        self.redis_client = redis_client
+        self.queues = queues
+
+    def _family(self) -> GaugeMetricFamily:
+        return GaugeMetricFamily(
+            "celery_queue_length", "Messages waiting in a Celery queue", labels=["queue"]
+        )
+
+    def describe(self):
+        yield self._family()
+
+    def collect(self):
+        family = self._family()
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for queue in self.queues:
+                pipe.llen(queue)
+            lengths = pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Can't read Celery queue lengths: %r", exc)
+            return
+        for queue, length in zip(self.queues, lengths):
+            family.add_metric([queue], length)
+        yield family
@@ -1,6 +1,29 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Numeric, DateTime, func
+from sqlalchemy import (
+    Column,
+    Computed,
+    Index,
+    Integer,
+    BigInteger,
+    String,
+    Text,
+    Boolean,
+    Numeric,
+    DateTime,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
+
 from app.database import Base
 
+# Full-text document for ranked product search (q=). SKU uses the 'simple'
+# config so codes aren't stemmed; name outranks description.
+PRODUCT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -14,6 +37,33 @@ class Product(Base):
     active = Column(Boolean, nullable=False, server_default="true")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Generated by Postgres; deferred so listings don't load it
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(PRODUCT_SEARCH_VECTOR_SQL, persisted=True))
+    )
+
+    # Trigram indexes serve the substring (LIKE/ILIKE '%x%') filters
+    __table_args__ = (
+        Index(
+            "ix_products_sku_trgm",
+            "sku",
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_products_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
 
 class UploadJob(Base):
@@ -23,15 +73,110 @@ class UploadJob(Base):
     filename = Column(String(255), nullable=False)
     status = Column(
         String(32), nullable=False
-    )  # pending, parsing, importing, completed, failed
+    )  # pending, parsing, importing, merging, completed, failed
     total_rows = Column(Integer, nullable=True)
     processed_rows = Column(Integer, nullable=False, default=0)
+    processed_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
+    loader = Column(String(16), nullable=True)  # insert, copy
+    shards = Column(Integer, nullable=True)  # set for sharded (parallel) imports
+    file_size = Column(BigInteger, nullable=True)
+    file_hash = Column(String(64), nullable=True)  # sha256 hex of the uploaded bytes
+    file_format = Column(String(16), nullable=True)  # csv (default), ndjson
+    compression = Column(String(8), nullable=True)  # gzip, zip; stored compressed
+    file_path = Column(String(512), nullable=True)  # stored upload, kept for resuming
+    # Written with every committed batch: where a resumed import picks up
+    checkpoint_offset = Column(BigInteger, nullable=True)  # in the decompressed content
+    checkpoint_rows = Column(Integer, nullable=True)
+    # Outcome counts, set when the import finishes (or fails)
+    inserted_rows = Column(Integer, nullable=True)
+    updated_rows = Column(Integer, nullable=True)
+    unchanged_rows = Column(Integer, nullable=True)
+    skipped_rows = Column(Integer, nullable=True)  # missing sku or name
+    # Feed imports: only rows that changed since the feed's last import are written
+    feed = Column(String(64), nullable=True)
+    deactivate_missing = Column(Boolean, nullable=False, default=False, server_default="false")
+    deactivated_rows = Column(Integer, nullable=True)
+    # Phase timings and counters of the last run (see app.import_profile)
+    profile = Column(JSONB, nullable=True)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ProductImportRow(Base):
+    """
+    Staging rows for sharded imports. Shards load here in parallel and the
+    final merge picks the highest seq per SKU, so the last occurrence in file
+    order wins. UNLOGGED because the rows are disposable.
+    """
+
+    __tablename__ = "product_import_rows"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    job_id = Column(Integer, primary_key=True)
+    seq = Column(BigInteger, primary_key=True)  # (shard << 32) | batch number
+    sku = Column(String(64), primary_key=True)
+    name = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    price = Column(Numeric(10, 2), nullable=True)
+
+
+class ImportFeed(Base):
+    """A named recurring upload, e.g. a supplier's nightly full catalog."""
+
+    __tablename__ = "import_feeds"
+
+    name = Column(String(64), primary_key=True)
+    last_file_hash = Column(String(64), nullable=True)  # of the last successful import
+    last_job_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class FeedFingerprint(Base):
+    """
+    Content fingerprint of each SKU as a feed last delivered it. Incoming rows
+    with a matching fingerprint are known unchanged and never hit products.
+    """
+
+    __tablename__ = "feed_fingerprints"
+
+    feed = Column(String(64), primary_key=True)
+    sku = Column(String(64), primary_key=True)
+    fingerprint = Column(BigInteger, nullable=False)  # 64-bit blake2b of name/description/price
+
+
+class DeleteJob(Base):
+    __tablename__ = "delete_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(32), nullable=False)  # pending, deleting, completed, failed
+    filters = Column(JSONB, nullable=True)  # same filters list_products accepts; empty = all
+    total_rows = Column(Integer, nullable=True)
+    deleted_rows = Column(Integer, nullable=False, default=0)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class OutboxEvent(Base):
+    """
+    Product events written in the same transaction as the change itself.
+    The relay task drains them into the webhook pipeline and deletes them.
+    """
+
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger, primary_key=True)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    # Failed dispatches; at OUTBOX_MAX_ATTEMPTS the relay leaves the event be
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Webhook(Base):
     __tablename__ = "webhooks"
 
@@ -39,8 +184,21 @@ class Webhook(Base):
     url = Column(String(500), nullable=False)
     event_type = Column(String(64), nullable=False)
     enabled = Column(Boolean, nullable=False, server_default="true")
+    # Batching mode: when batch_window_seconds is set, events are collected for
+    # up to that long (or until batch_max_events) and sent as one payload
+    batch_window_seconds = Column(Integer, nullable=True)
+    batch_max_events = Column(Integer, nullable=True)
     last_test_status_code = Column(Integer, nullable=True)
     last_test_response_time_ms = Column(Integer, nullable=True)
     last_test_error = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Serves the registry's cold load of subscribers for one event type
+    __table_args__ = (
+        Index(
+            "ix_webhooks_enabled_event_type",
+            func.lower(event_type),
+            postgresql_where=enabled.is_(True),
+        ),
+    )
@@ -0,0 +1,14 @@
+from typing import Any, Dict
+
+from app.models import OutboxEvent
+
+
+def add_event(db, event_type: str, payload: Dict[str, Any]):
+    """
+    Queue an event in the outbox as part of the caller's transaction.
+
+    Nothing leaves the process until the caller commits; the relay task then
+    hands it to the webhook pipeline. If the transaction rolls back, the
+    event goes with it.
+    """
+    db.add(OutboxEvent(event_type=event_type, payload=payload))
@@ -0,0 +1,179 @@
+from sqlalchemy import Boolean, Numeric, String, Text, cast, column, func, literal_column
+from sqlalchemy import or_, select, text, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.csv_columns import normalize_sku
+from app.models import Product
+
+# Like the import's merge, conflicting rows are only rewritten when something
+# differs; active is included because the bulk API sets it.
+_ROW_CHANGED = """
+    (products.name, products.description, products.price, products.active)
+    IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.description, EXCLUDED.price, EXCLUDED.active)
+"""
+
+_RETURNED = (
+    Product.id,
+    Product.sku,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.active,
+)
+
+_PATCH_FIELDS = (
+    ("name", String()),
+    ("description", Text()),
+    ("price", Numeric(10, 2)),
+    ("active", Boolean()),
+)
+
+
+class BulkWrite:
+    """
+    Per-item outcome of a bulk write, plus the rows it actually changed.
+
+    Items are matched by normalized SKU. When a SKU appears more than once
+    in a request, the last item wins for upserts and earlier ones are
+    reported as superseded; patches to the same SKU are merged in order.
+    """
+
+    def __init__(self, skus: list[str]):
+        self.results = [
+            {"index": i, "sku": sku, "id": None, "status": None} for i, sku in enumerate(skus)
+        ]
+        self.changed: list = []
+
+    def counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for r in self.results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        return counts
+
+    def resolve(self, db, latest: dict[str, int], missing_status: str):
+        """Fill in ids and statuses for rows the statement didn't return."""
+        for row in self.changed:
+            self.results[latest[row.sku]]["id"] = row.id
+
+        pending = [sku for sku, i in latest.items() if self.results[i]["status"] is None]
+        ids = {}
+        if pending:
+            rows = db.execute(select(Product.sku, Product.id).where(Product.sku.in_(pending)))
+            ids = dict(rows.all())
+        for sku in pending:
+            r = self.results[latest[sku]]
+            r["id"] = ids.get(sku)
+            r["status"] = "unchanged" if sku in ids else missing_status
+
+        for r in self.results:
+            if r["status"] in (None, "superseded"):
+                winner = self.results[latest[r["sku"]]]
+                r["id"] = winner["id"]
+                if r["status"] is None:
+                    r["status"] = winner["status"]
+
+
+def bulk_upsert(db, items: list) -> BulkWrite:
+    """
+    Create or update products by SKU with one INSERT ... ON CONFLICT.
+
+    The caller commits. Statuses: created, updated, unchanged, superseded
+    or invalid (blank SKU or name).
+    """
+    write = BulkWrite([normalize_sku(item.sku) for item in items])
+    latest: dict[str, int] = {}
+    for r, item in zip(write.results, items):
+        if not r["sku"] or not item.name.strip():
+            r["status"] = "invalid"
+            continue
+        previous = latest.get(r["sku"])
+        if previous is not None:
+            write.results[previous]["status"] = "superseded"
+        latest[r["sku"]] = r["index"]
+
+    if not latest:
+        return write
+
+    stmt = insert(Product).values(
+        [
+            {
+                "sku": sku,
+                "name": items[i].name,
+                "description": items[i].description,
+                "price": items[i].price,
+                "active": items[i].active,
+            }
+            for sku, i in latest.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={
+            "name": stmt.excluded.name,
+            "description": stmt.excluded.description,
+            "price": stmt.excluded.price,
+            "active": stmt.excluded.active,
+            "updated_at": func.now(),
+        },
+        where=text(_ROW_CHANGED),
+    ).returning(*_RETURNED, literal_column("xmax = 0").label("inserted"))
+
+    write.changed = db.execute(stmt).all()
+    for row in write.changed:
+        write.results[latest[row.sku]]["status"] = "created" if row.inserted else "updated"
+    write.resolve(db, latest, missing_status="unchanged")
+    return write
+
+
+def bulk_patch(db, items: list) -> BulkWrite:
+    """
+    Partially update existing products by SKU with one UPDATE ... FROM (VALUES ...).
+
+    Fields left out (None) keep their current value, as in update_product.
+    The caller commits. Statuses: updated, unchanged, not_found or invalid.
+    """
+    write = BulkWrite([normalize_sku(item.sku) for item in items])
+    latest: dict[str, int] = {}
+    patches: dict[str, dict] = {}
+    for r, item in zip(write.results, items):
+        if not r["sku"]:
+            r["status"] = "invalid"
+            continue
+        fields = {name: getattr(item, name) for name, _ in _PATCH_FIELDS}
+        patch = patches.setdefault(r["sku"], {})
+        patch.update((k, v) for k, v in fields.items() if v is not None)
+        latest[r["sku"]] = r["index"]
+
+    if not latest:
+        return write
+
+    patch_values = values(
+        column("sku", String(64)),
+        *(column(name, type_) for name, type_ in _PATCH_FIELDS),
+        name="patch",
+    ).data(
+        [
+            (sku, *(patches[sku].get(name) for name, _ in _PATCH_FIELDS))
+            for sku in latest
+        ]
+    )
+
+    # NULL means "leave as is"; the casts type columns that are NULL in every row
+    new = {
+        name: func.coalesce(cast(patch_values.c[name], type_), getattr(Product, name))
+        for name, type_ in _PATCH_FIELDS
+    }
+    stmt = (
+        update(Product)
+        .where(Product.sku == patch_values.c.sku)
+        .where(or_(*(new[name].is_distinct_from(getattr(Product, name)) for name in new)))
+        .values(**new, updated_at=func.now())
+        .returning(*_RETURNED)
+        .execution_options(synchronize_session=False)
+    )
+
+    write.changed = db.execute(stmt).all()
+    for row in write.changed:
+        write.results[latest[row.sku]]["status"] = "updated"
+    write.resolve(db, latest, missing_status="not_found")
+    return write
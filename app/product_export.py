@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from app.config import EXPORT_BATCH_SIZE
+from app.models import Product
+from app.product_filters import apply_product_filters
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+}
+
+# Exported columns, in order. sku/name/description/price are the import
+# columns, so an export can be uploaded again as-is.
+EXPORT_COLUMNS = ("id", "sku", "name", "description", "price", "active", "updated_at")
+
+
+def iter_export(
+    session_factory, file_format: str, compression: Optional[str] = None, **filters
+) -> Iterator[bytes]:
+    """
+    Stream the products matching `filters` as CSV or NDJSON chunks.
+
+    Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time and each
+    batch is encoded (and gzip-compressed when asked) before the next one is
+    fetched, so memory stays flat however big the catalog is. The generator
+    opens its own session from `session_factory` (the read replica's, when
+    routed there): it outlives the request's dependencies while the response
+    streams.
+    """
+    encode = _encode_csv if file_format == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(wbits=31) if compression == "gzip" else None
+
+    stmt, _ = apply_product_filters(
+        select(*(getattr(Product, c) for c in EXPORT_COLUMNS)), **filters
+    )
+    stmt = stmt.order_by(Product.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    db = session_factory()
+    try:
+        if file_format == "csv":
+            yield _compress(compressor, _csv_line(EXPORT_COLUMNS))
+        for rows in db.execute(stmt).partitions():
+            chunk = _compress(compressor, encode(rows))
+            if chunk:
+                yield chunk
+        if compressor is not None:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+
+def _compress(compressor, text: str) -> bytes:
+    data = text.encode("utf-8")
+    return compressor.compress(data) if compressor is not None else data
+
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _encode_csv(rows) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(
+        (
+            r.id,
+            r.sku,
+            r.name,
+            r.description or "",
+            "" if r.price is None else r.price,
+            "true" if r.active else "false",
+            r.updated_at.isoformat() if r.updated_at else "",
+        )
+        for r in rows
+    )
+    return buf.getvalue()
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": r.id,
+                "sku": r.sku,
+                "name": r.name,
+                "description": r.description,
+                "price": float(r.price) if r.price is not None else None,
+                "active": r.active,
+                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+            }
+        )
+        + "\n"
+        for r in rows
+    )
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from sqlalchemy import func
+
+from app.models import Product
+
+# Filter names accepted by list_products and bulk delete
+FILTER_FIELDS = ("sku", "name", "description", "active", "q")
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_product_filters(
+    query,
+    sku: Optional[str] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    active: Optional[bool] = None,
+    q: Optional[str] = None,
+):
+    """
+    Apply the product filters to an ORM Query or a select().
+
+    Returns (query, rank). rank is the full-text relevance expression when
+    `q` is given, otherwise None.
+    """
+    if sku:
+        # SKUs are stored uppercased, so a plain LIKE is case-insensitive and
+        # can use the trigram index on sku
+        pattern = f"%{escape_like(sku.strip().upper())}%"
+        query = query.filter(Product.sku.like(pattern, escape="\\"))
+    if name:
+        query = query.filter(Product.name.ilike(f"%{escape_like(name)}%", escape="\\"))
+    if description:
+        query = query.filter(
+            Product.description.ilike(f"%{escape_like(description)}%", escape="\\")
+        )
+    if active is not None:
+        query = query.filter(Product.active == active)
+
+    rank = None
+    if q and q.strip():
+        tsquery = func.websearch_to_tsquery("english", q)
+        query = query.filter(Product.search_vector.op("@@")(tsquery))
+        rank = func.ts_rank_cd(Product.search_vector, tsquery)
+
+    return query, rank
+
+
+def filters_dict(**filters) -> dict:
+    """Keep only the filters that actually constrain the result."""
+    return {
+        k: v
+        for k, v in filters.items()
+        if k in FILTER_FIELDS and v is not None and v != ""
+    }
@@ -0,0 +1,169 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+
+import redis
+
+from app.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# Live progress lives in Redis while a job runs. Postgres is only written at
+# phase transitions and at the end.
+PROGRESS_TTL_SECONDS = 24 * 60 * 60
+
+# Fields that are stored as integers in the progress hash
+_INT_FIELDS = ("processed_rows", "processed_bytes", "total_rows")
+
+
+def progress_key(job_id: int) -> str:
+    return f"upload_job:{job_id}:progress"
+
+
+def progress_channel(job_id: int) -> str:
+    return f"upload_job:{job_id}:events"
+
+
+def publish_progress(job_id: int, **fields):
+    """
+    Store progress fields for a job and notify subscribers.
+
+    Best effort: a Redis hiccup must never fail an import.
+    """
+    data = {k: v for k, v in fields.items() if v is not None}
+    if not data:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hset(progress_key(job_id), mapping=data)
+        pipe.expire(progress_key(job_id), PROGRESS_TTL_SECONDS)
+        pipe.publish(progress_channel(job_id), json.dumps(data))
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not publish progress for job %s: %r", job_id, exc)
+
+
+def increment_progress(job_id: int, rows: int, num_bytes: int):
+    """Atomically add to a job's counters (used by parallel shards) and notify subscribers."""
+    key = progress_key(job_id)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hincrby(key, "processed_rows", rows)
+        pipe.hincrby(key, "processed_bytes", num_bytes)
+        pipe.expire(key, PROGRESS_TTL_SECONDS)
+        processed_rows, processed_bytes, _ = pipe.execute()
+        redis_client.publish(
+            progress_channel(job_id),
+            json.dumps({"processed_rows": processed_rows, "processed_bytes": processed_bytes}),
+        )
+    except redis.RedisError as exc:
+        logger.warning("Could not publish progress for job %s: %r", job_id, exc)
+
+
+def parse_progress(raw: dict) -> dict:
+    """Convert a progress hash (or pub/sub message) into typed fields."""
+    parsed = dict(raw)
+    for name in _INT_FIELDS:
+        if parsed.get(name) is not None:
+            parsed[name] = int(parsed[name])
+    return parsed
+
+
+async def get_progress_async(job_id: int) -> dict:
+    try:
+        return parse_progress(await async_redis_client.hgetall(progress_key(job_id)))
+    except redis.RedisError:
+        return {}
+
+
+# A running import holds a claim in Redis, kept alive by a heartbeat thread. A
+# redelivered task (acks_late) only proceeds once the previous worker's claim
+# has lapsed, so a slow import is never run twice in parallel.
+JOB_CLAIM_TTL_SECONDS = 120
+
+# Several refreshes per TTL, so one slow Redis call can't let a claim lapse
+_CLAIM_HEARTBEAT_SECONDS = JOB_CLAIM_TTL_SECONDS / 4
+
+# Extend a claim only while it still holds this worker's token
+_REFRESH_CLAIM_SCRIPT = redis_client.register_script(
+    """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('EXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+)
+
+
+def claim_key(job_id: int) -> str:
+    return f"upload_job:{job_id}:claim"
+
+
+def claim_job(job_id: int, token: str) -> bool:
+    """
+    Claim a job for this worker. False if another worker holds it, or if
+    Redis is unavailable: two copies must never run a job at once.
+    """
+    try:
+        claimed = redis_client.set(
+            claim_key(job_id), token, nx=True, ex=JOB_CLAIM_TTL_SECONDS
+        )
+        return bool(claimed)
+    except redis.RedisError as exc:
+        logger.warning("Could not claim job %s: %r", job_id, exc)
+        return False
+
+
+def refresh_claim(job_id: int, token: str) -> bool:
+    """Extend this worker's claim. False only if the claim was lost to another worker."""
+    try:
+        return bool(
+            _REFRESH_CLAIM_SCRIPT(keys=[claim_key(job_id)], args=[token, JOB_CLAIM_TTL_SECONDS])
+        )
+    except redis.RedisError as exc:
+        logger.warning("Could not refresh claim on job %s: %r", job_id, exc)
+        return True
+
+
+@contextmanager
+def held_claim(job_id: int, token: str):
+    """
+    Keep a claim alive while the block runs and release it afterwards.
+
+    A background thread refreshes it, so no single phase of an import (a
+    large feed diff to load, missing products to deactivate) can outlast
+    the TTL and let a redelivered copy start alongside it.
+    """
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(_CLAIM_HEARTBEAT_SECONDS):
+            if not refresh_claim(job_id, token):
+                logger.error("Job %s: claim lost; another worker may run it", job_id)
+                return
+
+    thread = threading.Thread(target=heartbeat, name=f"claim-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        release_claim(job_id, token)
+
+
+def release_claim(job_id: int, token: str):
+    try:
+        if redis_client.get(claim_key(job_id)) == token:
+            redis_client.delete(claim_key(job_id))
+    except redis.RedisError:
+        pass
+
+
+def job_claimed(job_id: int) -> bool:
+    """Whether a live worker is currently running the job."""
+    try:
+        return bool(redis_client.exists(claim_key(job_id)))
+    except redis.RedisError:
+        return False
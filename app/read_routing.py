@@ -0,0 +1,77 @@
+import time
+
+from fastapi import Request, Response
+
+from app.config import DATABASE_READ_URL, READ_YOUR_WRITES_SECONDS
+from app.database import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal
+
+# Set on every successful write; holds the unix time until which this
+# client's reads go to the primary so it sees what it just wrote
+RECENT_WRITE_COOKIE = "recent_write"
+
+# API clients without a cookie jar can ask for the primary per request
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+# Which database served a read: "primary" or "replica"
+DB_ROUTE_HEADER = "X-DB-Route"
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def use_primary(request: Request) -> bool:
+    """Whether a read-only request must still be served by the primary."""
+    if not DATABASE_READ_URL:
+        return True
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        until = float(request.cookies.get(RECENT_WRITE_COOKIE) or 0)
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def _route(request: Request) -> bool:
+    primary = use_primary(request)
+    request.state.db_route = "primary" if primary else "replica"
+    return primary
+
+
+def read_session_factory(request: Request):
+    """Session factory for a read-only request, for code that opens its own sessions."""
+    return SessionLocal if _route(request) else ReadSessionLocal
+
+
+def get_read_db(request: Request):
+    """Like get_db, but on the read replica unless the client needs the primary."""
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Like get_async_db, but on the read replica unless the client needs the primary."""
+    factory = AsyncSessionLocal if _route(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def tag_response(request: Request, response: Response):
+    """Start a client's read-your-writes window after a write, and label reads with their route."""
+    if (
+        DATABASE_READ_URL
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            RECENT_WRITE_COOKIE,
+            f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}",
+            max_age=READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    route = getattr(request.state, "db_route", None)
+    if route:
+        response.headers[DB_ROUTE_HEADER] = route
@@ -0,0 +1,8 @@
+import redis
+import redis.asyncio as aioredis
+
+from app.config import REDIS_URL
+
+# Shared clients; connections are opened lazily from a per-process pool.
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+async_redis_client = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
@@ -1,20 +1,55 @@
+import base64
+import binascii
+import json
+import time
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_, select, text
 
+from app.cache import (
+    bump_catalog_version,
+    cache_stats,
+    get_cached_listing_async,
+    store_listing_async,
+)
+from app.config import PRODUCT_BULK_MAX_ITEMS, PRODUCT_CACHE_ENABLED, PRODUCT_COUNT_CACHE_TTL
+from app.csv_columns import normalize_sku
 from app.database import get_db
-from app.models import Product
-from app.schemas import ProductCreate, ProductUpdate, ProductOut, ProductList
-from app.tasks.webhooks import trigger_webhooks_for_event
+from app.models import DeleteJob, Product
+from app.outbox import add_event
+from app.product_bulk import bulk_patch, bulk_upsert
+from app.product_export import EXPORT_FORMATS, iter_export
+from app.product_filters import apply_product_filters, filters_dict
+from app.read_routing import get_async_read_db, get_read_db, read_session_factory
+from app.schemas import (
+    BulkWriteOut,
+    DeleteJobOut,
+    ProductBulkCreate,
+    ProductBulkPatch,
+    ProductCreate,
+    ProductList,
+    ProductOut,
+    ProductUpdate,
+)
+from app.tasks.delete_products import delete_products_task
 
 # NOTE: no prefix here; main.py adds prefix="/api"
 router = APIRouter(tags=["products"])
 
+TOTAL_MODES = ("exact", "estimate", "cached", "none")
 
-def _product_payload(product: Product) -> dict:
-    """Serialize Product to JSON-safe dict for Celery/webhooks."""
+# Exact counts for total="cached", keyed on the normalized filters:
+# key -> (expires_at, count). Bounded so odd filter combos can't grow it forever.
+_COUNT_CACHE: dict[tuple, tuple[float, int]] = {}
+_COUNT_CACHE_MAX_ENTRIES = 512
+
+
+def _product_payload(product) -> dict:
+    """Serialize a Product (or a row with the same columns) to a JSON-safe dict for webhooks."""
     price = product.price
     price_value = float(price) if price is not None else None
     return {
@@ -28,43 +63,264 @@ def _product_payload(product: Product) -> dict:
 
 
 @router.get("/products", response_model=ProductList)
-def list_products(
+async def list_products(
+    request: Request,
     sku: Optional[str] = None,
     name: Optional[str] = None,
     description: Optional[str] = None,
     active: Optional[bool] = None,
+    q: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    total: str = "exact",
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    query = db.query(Product)
-
-    if sku:
-        # SKUs stored uppercased; filter case-insensitively
-        query = query.filter(func.upper(Product.sku).like(f"%{sku.upper()}%"))
-    if name:
-        query = query.filter(Product.name.ilike(f"%{name}%"))
-    if description:
-        query = query.filter(Product.description.ilike(f"%{description}%"))
-    if active is not None:
-        query = query.filter(Product.active == active)
-
-    total = query.count()
-    items = (
-        query.order_by(Product.id).offset((page - 1) * page_size).limit(page_size).all()
+    """
+    List products, by page number or by keyset cursor.
+
+    Passing `cursor` (empty for the first page) switches to keyset mode:
+    rows come after the id encoded in the cursor, so deep pages cost the
+    same as the first one. `next_cursor` is returned whenever more rows
+    follow. `total` picks how the total is computed: a fresh COUNT(*)
+    ("exact"), planner statistics ("estimate"), a briefly cached exact
+    count ("cached") or not at all ("none").
+
+    `sku`, `name` and `description` are substring filters served by trigram
+    indexes. `q` is a ranked full-text search over all three; results are
+    ordered by relevance and the cursor carries the rank as well.
+
+    Responses are cached in Redis per catalog version (see app.cache).
+    Runs on the event loop with the async session and Redis client, on the
+    read replica when one is configured (see app.read_routing).
+    """
+    if total not in TOTAL_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"total must be one of: {', '.join(TOTAL_MODES)}"
+        )
+
+    version = None
+    cache_params = None
+    if PRODUCT_CACHE_ENABLED:
+        cache_params = {
+            "sku": (sku or "").strip().upper() or None,
+            "name": name.lower() if name else None,
+            "description": description.lower() if description else None,
+            "active": active,
+            "q": q.strip() if q and q.strip() else None,
+            "page": page if cursor is None else None,
+            "page_size": page_size,
+            "cursor": cursor,
+            "total": total,
+        }
+        version, cached = await get_cached_listing_async(cache_params)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+    query, rank = apply_product_filters(
+        select(Product), sku=sku, name=name, description=description, active=active, q=q
     )
 
-    return {
-        "items": items,
-        "page": page,
-        "page_size": page_size,
-        "total": total,
-    }
+    filters = (sku, name, description, active, q)
+    total_value, total_is_estimate = await _product_total(db, query, filters, total, version)
+
+    if rank is None:
+        page_query = query.order_by(Product.id)
+    else:
+        page_query = query.add_columns(rank.label("rank")).order_by(
+            rank.desc(), Product.id
+        )
+
+    if cursor is not None:
+        position = _decode_cursor(cursor)
+        if position is not None:
+            after_id = position["after_id"]
+            if rank is None:
+                page_query = page_query.filter(Product.id > after_id)
+            else:
+                if position.get("rank") is None:
+                    raise HTTPException(
+                        status_code=400, detail="Cursor does not match this search"
+                    )
+                after_rank = position["rank"]
+                page_query = page_query.filter(
+                    or_(rank < after_rank, and_(rank == after_rank, Product.id > after_id))
+                )
+    else:
+        page_query = page_query.offset((page - 1) * page_size)
+
+    # One extra row tells us whether there is a next page
+    rows = (await db.execute(page_query.limit(page_size + 1))).all()
+    if rank is None:
+        items, ranks = [r[0] for r in rows], None
+    else:
+        items, ranks = [r[0] for r in rows], [r[1] for r in rows]
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = _encode_cursor(
+            items[-1].id, ranks[page_size - 1] if ranks is not None else None
+        )
+
+    body = ProductList(
+        items=[ProductOut.model_validate(p) for p in items],
+        page=page if cursor is None else None,
+        page_size=page_size,
+        total=total_value,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+    ).model_dump_json()
+    if version is not None:
+        from_replica = request.state.db_route == "replica"
+        await store_listing_async(cache_params, version, body, from_replica=from_replica)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/products/cache-stats")
+def product_cache_stats():
+    """Hit/miss counters for the product listing cache."""
+    return cache_stats()
+
+
+@router.get("/products/export")
+def export_products(
+    request: Request,
+    file_format: str = Query("csv", alias="format"),
+    compression: Optional[str] = None,
+    sku: Optional[str] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    active: Optional[bool] = None,
+    q: Optional[str] = None,
+):
+    """
+    Stream every product matching the filters (the same ones list_products
+    accepts) as CSV or NDJSON, ordered by id. `compression=gzip` compresses
+    the stream on the fly.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if compression not in (None, "", "gzip"):
+        raise HTTPException(status_code=400, detail="compression must be gzip")
+
+    media_type, extension = EXPORT_FORMATS[file_format]
+    filename = f"products{extension}"
+    if compression:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+
+    body = iter_export(
+        read_session_factory(request),
+        file_format,
+        compression or None,
+        sku=sku,
+        name=name,
+        description=description,
+        active=active,
+        q=q,
+    )
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _encode_cursor(after_id: int, rank: Optional[float] = None) -> str:
+    position = {"after_id": after_id}
+    if rank is not None:
+        position["rank"] = rank
+    raw = json.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Optional[dict]:
+    """Decode an opaque cursor; an empty cursor means the first page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        position = {"after_id": int(data["after_id"])}
+        if data.get("rank") is not None:
+            position["rank"] = float(data["rank"])
+        return position
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _product_total(
+    db: AsyncSession, query, filters: tuple, mode: str, version: Optional[int] = None
+) -> tuple[Optional[int], bool]:
+    """
+    Return (total, is_estimate) for a filtered product query.
+
+    Cached counts are keyed on the catalog version too, so a write
+    invalidates them right away when the version is known.
+    """
+    if mode == "none":
+        return None, False
+
+    if mode == "estimate":
+        filtered = any(f is not None and f != "" for f in filters)
+        estimate = await _estimate_count(db, query, filtered)
+        if estimate is not None:
+            return estimate, True
+        # No statistics yet (table never analyzed); fall through to an exact count
+
+    if mode == "cached":
+        now = time.monotonic()
+        key = (version, filters)
+        hit = _COUNT_CACHE.get(key)
+        if hit and hit[0] > now:
+            return hit[1], False
+        count = await _exact_count(db, query)
+        if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX_ENTRIES:
+            _COUNT_CACHE.clear()
+        _COUNT_CACHE[key] = (now + PRODUCT_COUNT_CACHE_TTL, count)
+        return count, False
+
+    return await _exact_count(db, query), False
+
+
+async def _exact_count(db: AsyncSession, query) -> int:
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+
+async def _estimate_count(db: AsyncSession, query, filtered: bool) -> Optional[int]:
+    """
+    Estimate a row count from planner statistics instead of scanning.
+
+    Unfiltered: pg_class.reltuples. Filtered: the row estimate of the
+    query's plan, from EXPLAIN.
+    """
+    if not filtered:
+        reltuples = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'products'::regclass")
+        )
+        # -1 (or 0 on older servers) means the table was never analyzed
+        return int(reltuples) if reltuples and reltuples > 0 else None
+
+    # Compile with the connection's own dialect, which knows the driver's
+    # placeholders and casts and the server's string escaping, and pass the
+    # parameters straight to the driver so user input stays out of the SQL
+    conn = await db.connection()
+    compiled = query.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 @router.post("/products", response_model=ProductOut, status_code=201)
 def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
-    sku_normalized = payload.sku.strip().upper()
+    sku_normalized = normalize_sku(payload.sku)
     existing = db.query(Product).filter(Product.sku == sku_normalized).first()
     if existing:
         raise HTTPException(
@@ -79,19 +335,60 @@ def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
         active=payload.active,
     )
     db.add(product)
+    # Flush to get the id; the event commits (or rolls back) with the row
+    db.flush()
+    add_event(db, "product.created", _product_payload(product))
     db.commit()
     db.refresh(product)
+    bump_catalog_version()
 
-    # Fire webhook asynchronously, but never break the request if Celery/json fails
-    try:
-        trigger_webhooks_for_event.delay(
-            "product.created",
-            _product_payload(product),
+    return product
+
+
+@router.post("/products/bulk", response_model=BulkWriteOut)
+def bulk_upsert_products(payload: ProductBulkCreate, db: Session = Depends(get_db)):
+    """
+    Create or update many products by SKU in one statement.
+
+    Returns a result per item, in request order. Everything that changed is
+    announced in a single product.bulk_upserted event.
+    """
+    _check_bulk_size(payload.items)
+    write = bulk_upsert(db, payload.items)
+    return _finish_bulk_write(db, write, "product.bulk_upserted")
+
+
+@router.patch("/products/bulk", response_model=BulkWriteOut)
+def bulk_patch_products(payload: ProductBulkPatch, db: Session = Depends(get_db)):
+    """
+    Update fields of many existing products, matched by SKU, in one statement.
+
+    Omitted fields are left alone. Returns a result per item, in request
+    order; changes are announced in a single product.bulk_updated event.
+    """
+    _check_bulk_size(payload.items)
+    write = bulk_patch(db, payload.items)
+    return _finish_bulk_write(db, write, "product.bulk_updated")
+
+
+def _check_bulk_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="items must not be empty")
+    if len(items) > PRODUCT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {PRODUCT_BULK_MAX_ITEMS} items per request",
         )
-    except Exception:
-        pass
 
-    return product
+
+def _finish_bulk_write(db: Session, write, event_type: str) -> BulkWriteOut:
+    if write.changed:
+        products = [_product_payload(row) for row in write.changed]
+        add_event(db, event_type, {"count": len(products), "products": products})
+    db.commit()
+    if write.changed:
+        bump_catalog_version()
+    return BulkWriteOut(counts=write.counts(), items=write.results)
 
 
 @router.put("/products/{product_id}", response_model=ProductOut)
@@ -113,16 +410,10 @@ def update_product(
     if payload.active is not None:
         product.active = payload.active
 
+    add_event(db, "product.updated", _product_payload(product))
     db.commit()
     db.refresh(product)
-
-    try:
-        trigger_webhooks_for_event.delay(
-            "product.updated",
-            _product_payload(product),
-        )
-    except Exception:
-        pass
+    bump_catalog_version()
 
     return product
 
@@ -133,32 +424,59 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    sku_value = product.sku
+    add_event(db, "product.deleted", {"id": product_id, "sku": product.sku})
     db.delete(product)
     db.commit()
-
-    try:
-        trigger_webhooks_for_event.delay(
-            "product.deleted",
-            {"id": product_id, "sku": sku_value},
-        )
-    except Exception:
-        pass
+    bump_catalog_version()
 
     return
 
 
-@router.delete("/products")
-def delete_all_products(db: Session = Depends(get_db)):
-    deleted = db.query(Product).delete()
+@router.delete("/products", status_code=202)
+def delete_all_products(
+    sku: Optional[str] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    active: Optional[bool] = None,
+    q: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Start a background bulk delete of every product matching the filters
+    (the same ones list_products accepts). No filters deletes everything.
+
+    Returns a delete job to poll at /api/products/delete-jobs/{job_id}.
+    """
+    filters = filters_dict(sku=sku, name=name, description=description, active=active, q=q)
+
+    job = DeleteJob(status="pending", filters=filters, deleted_rows=0)
+    db.add(job)
     db.commit()
+    db.refresh(job)
 
-    try:
-        trigger_webhooks_for_event.delay(
-            "product.bulk_deleted",
-            {"deleted": deleted},
-        )
-    except Exception:
-        pass
+    delete_products_task.delay(job.id)
 
-    return {"deleted": deleted}
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/products/delete-jobs/{job_id}", response_model=DeleteJobOut)
+def get_delete_job(job_id: int, db: Session = Depends(get_read_db)):
+    job = db.get(DeleteJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Delete job not found")
+
+    percentage = None
+    if job.status == "completed":
+        percentage = 100.0
+    elif job.total_rows:
+        percentage = round(job.deleted_rows * 100.0 / job.total_rows, 2)
+
+    return DeleteJobOut(
+        id=job.id,
+        status=job.status,
+        filters=job.filters,
+        total_rows=job.total_rows,
+        deleted_rows=job.deleted_rows,
+        percentage=percentage,
+        error_message=job.error_message,
+    )
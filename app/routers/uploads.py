@@ -1,59 +1,393 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, Form, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config import UPLOAD_DIR
-from app.database import get_db
-from app.models import UploadJob
+from app.config import (
+    IMPORT_LOADER,
+    IMPORT_MAX_SHARDS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_DIR,
+    UPLOAD_MAX_BYTES,
+)
+from app.csv_utils import CsvRecordCounter
+from app.database import SessionLocal, get_async_db, get_db
+from app.import_profile import profile_path
+from app.models import ProductImportRow, UploadJob
+from app.progress import (
+    get_progress_async,
+    job_claimed,
+    parse_progress,
+    progress_channel,
+    progress_key,
+)
+from app.read_routing import get_async_read_db
+from app.redis_client import async_redis_client
 from app.schemas import UploadJobOut
 from app.tasks.import_products import import_products_task
+from app.upload_formats import GZIP_MAGIC, detect_format, inspect_zip
 
 router = APIRouter(tags=["uploads"])
 
+LOADERS = ("insert", "copy")
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Send an SSE comment this often so proxies don't drop an idle stream
+SSE_KEEPALIVE_SECONDS = 15
+
 
 @router.post("/uploads")
-async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+async def upload_csv(
+    file: UploadFile = File(...),
+    loader: str = Form(""),
+    shards: int = Form(1),
+    feed: str = Form(""),
+    deactivate_missing: bool = Form(False),
+    profile: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        file_format, compression, extension = detect_format(file.filename)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if loader and loader not in LOADERS:
+        raise HTTPException(
+            status_code=400, detail=f"loader must be one of: {', '.join(LOADERS)}"
+        )
+    if not 1 <= shards <= IMPORT_MAX_SHARDS:
+        raise HTTPException(
+            status_code=400, detail=f"shards must be between 1 and {IMPORT_MAX_SHARDS}"
+        )
+    if shards > 1:
+        # Shards stage their rows with COPY; an explicit insert can't be honored
+        if loader and loader != "copy":
+            raise HTTPException(status_code=400, detail="sharded imports use the copy loader")
+        loader = "copy"
+    loader = loader or IMPORT_LOADER
+    feed = feed.strip() or None
+    if feed is not None:
+        if len(feed) > 64:
+            raise HTTPException(status_code=400, detail="feed must be at most 64 characters")
+        if shards > 1:
+            # Diffing needs every row in file order in one process
+            raise HTTPException(status_code=400, detail="feed imports can't be sharded")
+    elif deactivate_missing:
+        raise HTTPException(status_code=400, detail="deactivate_missing requires a feed")
 
-    tmp_name = f"{uuid4()}.csv"
+    # Compressed uploads are stored as sent; the worker decompresses while reading
+    tmp_name = f"{uuid4()}{extension}"
     tmp_path = UPLOAD_DIR / tmp_name
 
-    contents = await file.read()
-    tmp_path.write_bytes(contents)
+    counter = CsvRecordCounter() if file_format == "csv" and compression is None else None
+    write_started = time.perf_counter()
+    try:
+        # Copying, hashing and counting are CPU and disk work; run them off
+        # the event loop so a large upload doesn't stall other requests
+        size, file_hash = await run_in_threadpool(
+            _store_upload, file.file, tmp_path, compression, counter
+        )
+        if compression == "zip":
+            try:
+                file_format = await run_in_threadpool(inspect_zip, tmp_path)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        await file.close()
 
     job = UploadJob(
         filename=file.filename,
         status="pending",
-        total_rows=None,
+        total_rows=counter.data_rows if counter is not None else None,
         processed_rows=0,
+        loader=loader,
+        file_size=size,
+        file_hash=file_hash,
+        file_format=file_format,
+        compression=compression,
+        file_path=str(tmp_path),
+        feed=feed,
+        deactivate_missing=deactivate_missing,
+        # The worker keeps this phase when it fills in the rest of the profile
+        profile={"phases": {"upload_write": round(time.perf_counter() - write_started, 3)}},
     )
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    await db.commit()
 
-    import_products_task.delay(job.id, str(tmp_path))
+    import_products_task.delay(job.id, str(tmp_path), loader, shards, cprofile=profile)
 
-    return {"job_id": job.id, "status": job.status}
+    return {"job_id": job.id, "status": job.status, "loader": loader}
+
+
+def _store_upload(
+    src, dest: Path, compression: Optional[str], counter: Optional[CsvRecordCounter]
+) -> tuple[int, str]:
+    """
+    Copy an upload to disk in fixed-size chunks so memory stays flat however
+    large it is. Hash and count records on the way through so the worker
+    doesn't need its own counting pass (plain CSV only; other formats get an
+    estimate from bytes read). Returns (size, sha256 hex digest).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with dest.open("wb") as out:
+        while True:
+            chunk = src.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > UPLOAD_MAX_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File exceeds the maximum upload size of {UPLOAD_MAX_BYTES} bytes",
+                )
+            if compression == "gzip" and size == len(chunk):
+                # First chunk: catch mislabeled files before storing them
+                if not chunk.startswith(GZIP_MAGIC):
+                    raise HTTPException(status_code=400, detail="File is not gzip-compressed")
+            out.write(chunk)
+            digest.update(chunk)
+            if counter is not None:
+                counter.feed(chunk)
+    return size, digest.hexdigest()
 
 
 @router.get("/uploads/{job_id}", response_model=UploadJobOut)
-def get_upload_status(job_id: int, db: Session = Depends(get_db)):
+async def get_upload_status(job_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    job = await db.get(UploadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+
+    state = _job_state(job)
+    _apply_live_progress(state, await get_progress_async(job_id))
+    return _job_out(state)
+
+
+@router.get("/uploads/{job_id}/profile.prof")
+def download_upload_profile(job_id: int, db: Session = Depends(get_db)):
+    """cProfile stats of a job uploaded with profile=true, for pstats or snakeviz."""
     job = db.get(UploadJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Upload job not found")
+    path = profile_path(job_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No cProfile data for this upload job")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
 
-    percentage = None
-    if job.total_rows and job.total_rows > 0:
-        percentage = round(job.processed_rows * 100.0 / job.total_rows, 2)
-
-    return UploadJobOut(
-        id=job.id,
-        filename=job.filename,
-        status=job.status,
-        total_rows=job.total_rows,
-        processed_rows=job.processed_rows,
-        percentage=percentage,
-        error_message=job.error_message,
+
+@router.post("/uploads/{job_id}/resume", status_code=202)
+def resume_upload(job_id: int, db: Session = Depends(get_db)):
+    """
+    Requeue an import that failed or whose worker went away, continuing from
+    its last checkpoint.
+
+    Sharded jobs keep no checkpoint; once failed, their staged rows are
+    dropped and the file is imported again in a single pass (a re-run leaves
+    products as a single run would). While one is importing or merging its
+    shard tasks hold no claim, so it can't be told apart from an abandoned
+    one and is refused: its tasks are acknowledged late and fail the job if
+    they can't finish.
+    """
+    job = db.get(UploadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail="Upload job already completed")
+    if job.status == "pending" or job_claimed(job_id):
+        raise HTTPException(status_code=409, detail="Upload job is still running")
+    if job.shards and job.status in ("importing", "merging"):
+        raise HTTPException(
+            status_code=409,
+            detail="Sharded upload job is still running; resume it once it has failed",
+        )
+    if not job.file_path or not Path(job.file_path).exists():
+        raise HTTPException(
+            status_code=409, detail="Uploaded file is no longer on the server; upload it again"
+        )
+
+    if job.shards:
+        db.execute(delete(ProductImportRow).where(ProductImportRow.job_id == job_id))
+        job.shards = None
+        job.checkpoint_offset = None
+        job.checkpoint_rows = None
+        job.inserted_rows = job.updated_rows = job.skipped_rows = None
+
+    job.status = "pending"
+    job.error_message = None
+    db.commit()
+
+    import_products_task.delay(job.id, job.file_path, job.loader or IMPORT_LOADER, 1)
+
+    return {"job_id": job.id, "status": job.status, "resume_from_rows": job.checkpoint_rows or 0}
+
+
+@router.get("/uploads/{job_id}/events")
+async def upload_events(job_id: int, request: Request):
+    """
+    Server-Sent Events stream of a job's status and progress.
+
+    The worker publishes progress to Redis; this relays it to the browser
+    without touching Postgres except for the first and final snapshot.
+    """
+    state = await run_in_threadpool(_load_job_state, job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+
+    return StreamingResponse(
+        _event_stream(job_id, state, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+async def _event_stream(job_id: int, state: dict, request: Request):
+    pubsub = async_redis_client.pubsub()
+    # Subscribe before reading the snapshot so no update falls in between
+    await pubsub.subscribe(progress_channel(job_id))
+    try:
+        live = parse_progress(await async_redis_client.hgetall(progress_key(job_id)))
+        _apply_live_progress(state, live)
+        yield _sse_event(state)
+
+        while state["status"] not in TERMINAL_STATUSES:
+            if await request.is_disconnected():
+                break
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=SSE_KEEPALIVE_SECONDS
+            )
+            if message is None:
+                # The worker's final publish is best effort; if it was lost,
+                # the job row still has the outcome
+                final = await run_in_threadpool(_load_job_state, job_id)
+                if final is not None and final["status"] in TERMINAL_STATUSES:
+                    yield _sse_event(final)
+                    break
+                yield ": keepalive\n\n"
+                continue
+
+            state.update(parse_progress(json.loads(message["data"])))
+            if state["status"] in TERMINAL_STATUSES:
+                # Final numbers and timestamps come from Postgres
+                final = await run_in_threadpool(_load_job_state, job_id)
+                if final is not None:
+                    state = final
+            yield _sse_event(state)
+    finally:
+        await pubsub.reset()
+
+
+def _sse_event(state: dict) -> str:
+    return f"event: progress\ndata: {_job_out(state).model_dump_json()}\n\n"
+
+
+def _load_job_state(job_id: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        job = db.get(UploadJob, job_id)
+        return _job_state(job) if job else None
+    finally:
+        db.close()
+
+
+def _job_state(job: UploadJob) -> dict:
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows or 0,
+        "processed_bytes": job.processed_bytes or 0,
+        "loader": job.loader,
+        "shards": job.shards,
+        "file_size": job.file_size,
+        "file_hash": job.file_hash,
+        "file_format": job.file_format,
+        "compression": job.compression,
+        "checkpoint_offset": job.checkpoint_offset,
+        "checkpoint_rows": job.checkpoint_rows,
+        "inserted_rows": job.inserted_rows,
+        "updated_rows": job.updated_rows,
+        "unchanged_rows": job.unchanged_rows,
+        "skipped_rows": job.skipped_rows,
+        "feed": job.feed,
+        "deactivated_rows": job.deactivated_rows,
+        "error_message": job.error_message,
+        "profile": job.profile,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _apply_live_progress(state: dict, live: dict):
+    """Overlay the worker's live counters from Redis while a job is running."""
+    if state["status"] in TERMINAL_STATUSES:
+        return
+    for name in ("processed_rows", "processed_bytes"):
+        if live.get(name) is not None:
+            state[name] = live[name]
+
+
+def _job_out(state: dict) -> UploadJobOut:
+    fields = {k: v for k, v in state.items() if k not in ("started_at", "finished_at")}
+    return UploadJobOut(**fields, **_progress_stats(SimpleNamespace(**state)))
+
+
+def _progress_stats(job) -> dict:
+    """
+    Derive percentage, estimated row total, throughput and ETA for a job.
+
+    Progress is measured in bytes consumed against file size; the row total
+    is the upload-time count when known, otherwise extrapolated from the
+    average bytes per row seen so far.
+    """
+    processed_rows = job.processed_rows or 0
+    processed_bytes = job.processed_bytes or 0
+    file_size = job.file_size or 0
+
+    percentage = None
+    if job.status == "completed":
+        percentage = 100.0
+    elif file_size > 0:
+        percentage = round(processed_bytes * 100.0 / file_size, 2)
+    elif job.total_rows and job.total_rows > 0:
+        percentage = round(processed_rows * 100.0 / job.total_rows, 2)
+
+    estimated_total = job.total_rows
+    if estimated_total is None and processed_bytes > 0 and file_size > 0:
+        estimated_total = int(processed_rows * file_size / processed_bytes)
+
+    rows_per_second = None
+    eta_seconds = None
+    if job.started_at:
+        started = job.started_at
+        if started.tzinfo is None:
+            started = started.replace(tzinfo=timezone.utc)
+        end = job.finished_at or datetime.now(timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        elapsed = (end - started).total_seconds()
+        if elapsed > 0 and processed_rows > 0:
+            rows_per_second = round(processed_rows / elapsed, 1)
+            if job.status == "importing" and processed_bytes > 0 and file_size > 0:
+                bytes_per_second = processed_bytes / elapsed
+                eta_seconds = round((file_size - processed_bytes) / bytes_per_second, 1)
+
+    return {
+        "percentage": percentage,
+        "estimated_total_rows": estimated_total,
+        "rows_per_second": rows_per_second,
+        "eta_seconds": eta_seconds,
+    }
@@ -1,12 +1,18 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config import WEBHOOK_BATCH_MAX_WINDOW
 from app.database import get_db
 from app.models import Webhook
+from app.read_routing import get_async_read_db
 from app.tasks.webhooks import test_webhook_task
+from app.webhook_breaker import breaker_states_async
+from app.webhook_registry import bump_webhooks_version
 
 router = APIRouter(tags=["webhooks"])  # main.py adds prefix="/api"
 
@@ -15,23 +21,51 @@ class WebhookIn(BaseModel):
     url: str
     event_type: str
     enabled: bool = True
-
-
-def _serialize_webhook(h: Webhook) -> dict:
+    # Batching mode: unset/0 delivers every event on its own
+    batch_window_seconds: Optional[int] = None
+    batch_max_events: Optional[int] = None
+
+
+def _batch_settings(payload: WebhookIn) -> tuple[Optional[int], Optional[int]]:
+    window = payload.batch_window_seconds or None
+    max_events = payload.batch_max_events or None
+    if window is not None and not 0 < window <= WEBHOOK_BATCH_MAX_WINDOW:
+        raise HTTPException(
+            status_code=400,
+            detail=f"batch_window_seconds must be between 1 and {WEBHOOK_BATCH_MAX_WINDOW}",
+        )
+    if max_events is not None and max_events < 1:
+        raise HTTPException(status_code=400, detail="batch_max_events must be positive")
+    if max_events is not None and window is None:
+        raise HTTPException(
+            status_code=400, detail="batch_max_events requires batch_window_seconds"
+        )
+    return window, max_events
+
+
+def _serialize_webhook(h: Webhook, breaker: Optional[dict] = None) -> dict:
+    breaker = breaker or {}
     return {
         "id": h.id,
         "url": h.url,
         "event_type": h.event_type,
         "enabled": h.enabled,
-        "last_status_code": h.last_status_code,
-        "last_response_ms": h.last_response_ms,
+        "batch_window_seconds": h.batch_window_seconds,
+        "batch_max_events": h.batch_max_events,
+        "last_status_code": h.last_test_status_code,
+        "last_response_ms": h.last_test_response_time_ms,
+        "last_error": h.last_test_error,
+        "breaker_state": breaker.get("state"),
+        "breaker_failures": breaker.get("failures"),
+        "breaker_open_until": breaker.get("open_until"),
     }
 
 
 @router.get("/webhooks")
-def list_webhooks(db: Session = Depends(get_db)) -> List[dict]:
-    hooks = db.query(Webhook).order_by(Webhook.id).all()
-    return [_serialize_webhook(h) for h in hooks]
+async def list_webhooks(db: AsyncSession = Depends(get_async_read_db)) -> List[dict]:
+    hooks = (await db.scalars(select(Webhook).order_by(Webhook.id))).all()
+    breakers = await breaker_states_async({h.id: h.url for h in hooks})
+    return [_serialize_webhook(h, breakers.get(h.id)) for h in hooks]
 
 
 @router.post("/webhooks")
@@ -40,15 +74,19 @@ def create_webhook(payload: WebhookIn, db: Session = Depends(get_db)) -> dict:
     event_type = payload.event_type.strip()
     if not url or not event_type:
         raise HTTPException(status_code=400, detail="url and event_type are required")
+    window, max_events = _batch_settings(payload)
 
     hook = Webhook(
         url=url,
         event_type=event_type,
         enabled=payload.enabled,
+        batch_window_seconds=window,
+        batch_max_events=max_events,
     )
     db.add(hook)
     db.commit()
     db.refresh(hook)
+    bump_webhooks_version()
     return _serialize_webhook(hook)
 
 
@@ -61,13 +99,17 @@ def update_webhook(
     hook = db.get(Webhook, webhook_id)
     if not hook:
         raise HTTPException(status_code=404, detail="Webhook not found")
+    window, max_events = _batch_settings(payload)
 
     hook.url = payload.url.strip()
     hook.event_type = payload.event_type.strip()
     hook.enabled = payload.enabled
+    hook.batch_window_seconds = window
+    hook.batch_max_events = max_events
 
     db.commit()
     db.refresh(hook)
+    bump_webhooks_version()
     return _serialize_webhook(hook)
 
 
@@ -79,6 +121,8 @@ def delete_webhook(webhook_id: int, db: Session = Depends(get_db)) -> dict:
 
     db.delete(hook)
     db.commit()
+    bump_webhooks_version()
+    reset_breaker(webhook_id)
     return {"ok": True}
 
 
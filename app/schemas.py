@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 # ----- Product -----
@@ -31,15 +31,41 @@ class ProductOut(ProductBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProductList(BaseModel):
     items: list[ProductOut]
-    page: int
+    page: Optional[int] = None  # None in cursor mode
     page_size: int
-    total: int
+    total: Optional[int] = None  # None when total="none"
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
+
+class ProductBulkCreate(BaseModel):
+    items: list[ProductCreate]
+
+
+class ProductBulkPatchItem(ProductUpdate):
+    sku: str
+
+
+class ProductBulkPatch(BaseModel):
+    items: list[ProductBulkPatchItem]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    sku: str
+    id: Optional[int] = None
+    # created, updated, unchanged, superseded, not_found or invalid
+    status: str
+
+
+class BulkWriteOut(BaseModel):
+    counts: dict[str, int]
+    items: list[BulkItemResult]
 
 
 # ----- Upload job -----
@@ -51,11 +77,45 @@ class UploadJobOut(BaseModel):
     status: str
     total_rows: Optional[int] = None
     processed_rows: int
+    processed_bytes: int = 0
+    percentage: Optional[float] = None
+    estimated_total_rows: Optional[int] = None
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    loader: Optional[str] = None
+    shards: Optional[int] = None
+    file_size: Optional[int] = None
+    file_hash: Optional[str] = None
+    file_format: Optional[str] = None
+    compression: Optional[str] = None
+    checkpoint_offset: Optional[int] = None
+    checkpoint_rows: Optional[int] = None
+    inserted_rows: Optional[int] = None
+    updated_rows: Optional[int] = None
+    unchanged_rows: Optional[int] = None
+    skipped_rows: Optional[int] = None
+    feed: Optional[str] = None
+    deactivated_rows: Optional[int] = None
+    error_message: Optional[str] = None
+    # Phase timings and counters of the last run (see app.import_profile)
+    profile: Optional[dict] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# ----- Delete job -----
+
+
+class DeleteJobOut(BaseModel):
+    id: int
+    status: str
+    filters: Optional[dict] = None
+    total_rows: Optional[int] = None
+    deleted_rows: int
     percentage: Optional[float] = None
     error_message: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----- Webhook -----
@@ -83,5 +143,4 @@ class WebhookOut(WebhookBase):
     last_test_response_time_ms: Optional[int] = None
     last_test_error: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, text, update
+
+from app.cache import bump_catalog_version
+from app.celery_app import celery_app
+from app.config import DELETE_BATCH_SIZE
+from app.database import SessionLocal
+from app.models import DeleteJob, ImportFeed, Product
+from app.outbox import add_event
+from app.product_filters import apply_product_filters
+
+
+@celery_app.task
+def delete_products_task(job_id: int):
+    """
+    Bulk-delete products in the background.
+
+    - No filters: TRUNCATE, which is instant and doesn't write per-row WAL.
+      Feeds forget what they imported along with it, so their next upload
+      writes everything again.
+    - Filters: delete matching rows in batches of DELETE_BATCH_SIZE, one
+      transaction each, so locks stay short and progress is visible.
+    """
+    db = SessionLocal()
+    job = db.get(DeleteJob, job_id)
+    if not job:
+        db.close()
+        return
+
+    filters = job.filters or {}
+
+    job.status = "deleting"
+    job.started_at = datetime.utcnow()
+    db.commit()
+
+    deleted = 0
+    try:
+        match_ids, _ = apply_product_filters(select(Product.id), **filters)
+
+        job.total_rows = db.execute(
+            select(func.count()).select_from(match_ids.subquery())
+        ).scalar()
+        db.commit()
+
+        if not filters:
+            db.execute(text("TRUNCATE TABLE products, feed_fingerprints"))
+            db.execute(update(ImportFeed).values(last_file_hash=None))
+            deleted = job.total_rows
+            job.deleted_rows = deleted
+            db.commit()
+        else:
+            while True:
+                batch_ids = match_ids.order_by(Product.id).limit(DELETE_BATCH_SIZE)
+                result = db.execute(
+                    delete(Product)
+                    .where(Product.id.in_(batch_ids.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 0:
+                    break
+                deleted += result.rowcount
+                job.deleted_rows = deleted
+                db.commit()
+
+        job.status = "completed"
+        job.finished_at = datetime.utcnow()
+        add_event(
+            db,
+            "product.bulk_deleted",
+            {"job_id": job_id, "deleted": deleted, "filters": filters},
+        )
+        db.commit()
+        bump_catalog_version()
+
+    except Exception as exc:
+        db.rollback()
+        job.status = "failed"
+        job.error_message = str(exc)
+        job.deleted_rows = deleted
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        # Batches committed before the failure are gone
+        bump_catalog_version()
+        raise
+    finally:
+        db.close()
@@ -1,27 +1,177 @@
+import cProfile
 import csv
-from decimal import Decimal
-from datetime import datetime
+import io
+from datetime import datetime, timezone
 from pathlib import Path
+from uuid import uuid4
 
+from celery import chord
+from celery.exceptions import MaxRetriesExceededError
+from celery.utils.log import get_task_logger
+from sqlalchemy import delete, literal_column, text, update
 from sqlalchemy.dialects.postgresql import insert
 
+from app.cache import bump_catalog_version
 from app.celery_app import celery_app
+from app.csv_columns import ColumnBatch, ColumnMapping, iter_column_batches, normalize_batch
+from app.csv_utils import OffsetLineReader, find_row_boundaries
 from app.database import SessionLocal
-from app.models import Product, UploadJob
-from app.tasks.webhooks import trigger_webhooks_for_event
+from app.feeds import FeedDiff, feed_unchanged, record_feed_import
+from app.import_profile import ImportProfile, save_cprofile
+from app.metrics import IMPORT_WRITE_SECONDS, PhaseTimer, record_import_batch
+from app.models import ImportFeed, Product, ProductImportRow, UploadJob
+from app.outbox import add_event
+from app.progress import (
+    JOB_CLAIM_TTL_SECONDS,
+    claim_job,
+    held_claim,
+    increment_progress,
+    publish_progress,
+)
+from app.upload_formats import iter_upload_batches, open_upload
 
+logger = get_task_logger(__name__)
 
-@celery_app.task
-def import_products_task(job_id: int, file_path: str):
+# Rows per batch for each loader. COPY has no bind-parameter limit and a much
+# cheaper per-row cost, so it can take bigger chunks.
+BATCH_SIZES = {
+    "insert": 2000,
+    "copy": 20000,
+}
+
+# Session-local staging table for the COPY loader. Rows are dropped on every
+# commit, so each chunk starts with an empty table.
+_STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS products_stage (
+    sku varchar(64) NOT NULL,
+    name varchar(255) NOT NULL,
+    description text,
+    price numeric(10, 2)
+) ON COMMIT DELETE ROWS
+"""
+
+_STAGE_COPY = """
+COPY products_stage (sku, name, description, price)
+FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (sku, name, description))
+"""
+
+# Conflicting rows are only rewritten when their data differs, so
+# re-importing an unchanged catalog creates no dead tuples and little WAL.
+_ROW_CHANGED = """
+    (products.name, products.description, products.price)
+    IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.description, EXCLUDED.price)
+"""
+
+# Wraps a merge that RETURNs (xmax = 0) AS inserted into one (inserted,
+# updated) row; xmax is 0 only for freshly inserted tuples.
+_COUNT_MERGED = """
+WITH merged AS ({merge})
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+FROM merged
+"""
+
+_STAGE_MERGE = _COUNT_MERGED.format(
+    merge=f"""
+INSERT INTO products (sku, name, description, price)
+SELECT sku, name, description, price FROM products_stage
+ON CONFLICT (sku) DO UPDATE SET
+    name = EXCLUDED.name,
+    description = EXCLUDED.description,
+    price = EXCLUDED.price,
+    updated_at = now()
+WHERE {_ROW_CHANGED}
+RETURNING (xmax = 0) AS inserted
+"""
+)
+
+_SHARD_COPY = """
+COPY product_import_rows (job_id, seq, sku, name, description, price)
+FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (sku, name, description))
+"""
+
+# Highest seq per SKU is the last occurrence in file order
+_SHARD_MERGE = _COUNT_MERGED.format(
+    merge=f"""
+INSERT INTO products (sku, name, description, price)
+SELECT DISTINCT ON (sku) sku, name, description, price
+FROM product_import_rows
+WHERE job_id = :job_id
+ORDER BY sku, seq DESC
+ON CONFLICT (sku) DO UPDATE SET
+    name = EXCLUDED.name,
+    description = EXCLUDED.description,
+    price = EXCLUDED.price,
+    updated_at = now()
+WHERE {_ROW_CHANGED}
+RETURNING (xmax = 0) AS inserted
+"""
+)
+
+
+# A copy that finds its job claimed retries every JOB_CLAIM_TTL_SECONDS; after
+# this many tries (an hour) it gives up and leaves the job to resume_upload
+JOB_CLAIM_MAX_RETRIES = 30
+
+
+@celery_app.task(
+    bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=JOB_CLAIM_MAX_RETRIES
+)
+def import_products_task(
+    self,
+    job_id: int,
+    file_path: str,
+    loader: str = "insert",
+    shards: int = 1,
+    cprofile: bool = False,
+):
+    """
+    Import an uploaded file into products.
+
+    The message is only acknowledged once the task returns, so an import cut
+    short by a crash or redeploy is redelivered and picks up from the job's
+    last checkpoint. A Redis claim keeps a redelivered copy from running
+    alongside one that is still alive; a copy that finds the job claimed
+    tries again once the claim could have lapsed, since the claim may belong
+    to the worker that died.
+
+    With `cprofile` the import runs serially under cProfile and the stats
+    are saved next to the job's profile (see app.import_profile).
+    """
+    token = uuid4().hex
+    if not claim_job(job_id, token):
+        logger.info("Job %s is claimed by another worker; retrying later", job_id)
+        try:
+            raise self.retry(countdown=JOB_CLAIM_TTL_SECONDS)
+        except MaxRetriesExceededError:
+            logger.warning(
+                "Job %s: still claimed after %d retries, giving up", job_id, JOB_CLAIM_MAX_RETRIES
+            )
+            return
+    with held_claim(job_id, token):
+        _run_import(job_id, file_path, loader, shards, cprofile)
+
+
+def _run_import(job_id: int, file_path: str, loader: str, shards: int, cprofile: bool):
     db = SessionLocal()
     job = db.get(UploadJob, job_id)
-    if not job:
+    # A failed job only runs again through resume_upload, which sets it back
+    # to pending; a late redelivered copy must not restart it
+    if not job or job.status in ("completed", "failed"):
+        db.close()
+        return
+    if job.shards and job.status in ("importing", "merging"):
+        # Redelivered after the shards were fanned out; the chord finishes it
         db.close()
         return
 
+    write_batch = _copy_batch if loader == "copy" else _upsert_batch
+
+    job.loader = loader
     job.status = "parsing"
-    job.started_at = datetime.utcnow()
+    if job.started_at is None:
+        job.started_at = datetime.utcnow()
     db.commit()
+    _publish_job(job)
 
     path = Path(file_path)
     if not path.exists():
@@ -29,104 +179,293 @@ def import_products_task(job_id: int, file_path: str):
         job.error_message = "Uploaded file not found on server"
         job.finished_at = datetime.utcnow()
         db.commit()
+        _publish_job(job)
+        db.close()
+        return
+
+    if job.file_size is None:
+        job.file_size = path.stat().st_size
+
+    if job.feed and feed_unchanged(db, job):
+        _complete_unchanged_feed(db, job)
         db.close()
         return
 
-    # Count total rows for progress (minus header)
-    with path.open("r", newline="") as f:
-        total = sum(1 for _ in f) - 1
-    if total < 0:
-        total = 0
+    resume_from = job.checkpoint_offset or 0
+    if resume_from:
+        # Shards keep no checkpoint, so a resumed job always runs serially
+        shards = 1
+    elif cprofile:
+        # cProfile only sees the process it runs in
+        shards = 1
+    elif shards > 1 and (job.feed or job.compression or job.file_format == "ndjson"):
+        # Shards split the stored file at byte offsets, which only works for
+        # plain CSV; everything else is imported in one pass
+        logger.info("Job %s: importing serially instead of in %d shards", job_id, shards)
+        shards = 1
 
-    job.total_rows = total
+    if shards > 1:
+        try:
+            _start_sharded_import(db, job, path, shards)
+        except Exception as exc:
+            db.rollback()
+            job.status = "failed"
+            job.error_message = str(exc)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            _publish_job(job)
+            raise
+        finally:
+            db.close()
+        return
+
+    # Single pass: progress is tracked as bytes consumed against file size
+    # rather than by counting rows up front.
     job.status = "importing"
+    job.error_message = None
+    job.finished_at = None
     db.commit()
+    _publish_job(job)
 
-    processed = 0
-    batch_size = 2000
+    processed = job.checkpoint_rows or 0
+    processed_bytes = 0
+    counts = ImportCounts.from_job(job) if resume_from else ImportCounts()
+    batch_size = BATCH_SIZES.get(loader, BATCH_SIZES["insert"])
+    deactivate_missing = bool(job.deactivate_missing)
+    if resume_from:
+        logger.info("Job %s: resuming after %d rows (offset %d)", job_id, processed, resume_from)
 
+    # Counts this run only; a resumed job's profile starts over
+    profile = ImportProfile(job.profile)
+    profiler = cProfile.Profile() if cprofile else None
+    timer = PhaseTimer()
     try:
-        with path.open("r", newline="") as f:
-            reader = csv.DictReader(f)
-            batch: list[dict] = []
-
-            for row in reader:
-                batch.append(row)
-                if len(batch) >= batch_size:
-                    _upsert_batch(db, batch)
-                    processed += len(batch)  # count CSV rows, even if deduped
-                    job.processed_rows = processed
-                    db.commit()
-                    batch.clear()
-
-            if batch:
-                _upsert_batch(db, batch)
-                processed += len(batch)
-                job.processed_rows = processed
+        if profiler is not None:
+            profiler.enable()
+        feed = FeedDiff.load(db, job.feed) if job.feed else None
+        if feed is not None and deactivate_missing and resume_from:
+            # Rows before the checkpoint still count as sent by the feed
+            feed.seen.update(_skus_before(path, job, resume_from, batch_size))
+
+        # Compressed uploads are decompressed as a stream, never inflated to disk
+        with open_upload(path, job.compression) as (lines, consumed):
+            batches = iter_upload_batches(lines, job.file_format, batch_size, start=resume_from)
+            # A few perf_counter() calls per batch of thousands of rows
+            timer.mark("setup")
+            profile.add(timer.take(), batches=0)
+            for batch in batches:
+                timer.mark("parse")
+                batch_counts = _import_batch(
+                    db, batch, write_batch, feed, deactivate_missing, timer
+                )
+                counts.add(*batch_counts)
+                processed += batch.rows  # count CSV rows, even if deduped
+                # The checkpoint commits with the batch, so a resumed import
+                # never writes a batch twice or skips one
+                _checkpoint(db, job_id, lines.offset, processed, counts)
+                timer.mark("db")
                 db.commit()
+                timer.mark("commit")
+                phases = timer.take()
+                record_import_batch(loader, batch.rows, phases)
+                profile.add(phases, batch.rows)
+                processed_bytes = consumed()
+                # Live progress goes to Redis; the job row is left alone
+                publish_progress(job_id, processed_rows=processed, processed_bytes=processed_bytes)
+                timer.mark("progress")
+            timer.mark("parse")
+            profile.add(timer.take(), batches=0)
+            processed_bytes = job.file_size
 
+        # The estimate is replaced by the real count once the whole file is read
+        job.total_rows = processed
+        job.processed_rows = processed
+        job.processed_bytes = processed_bytes
+        counts.apply(job, processed)
+        if feed is not None:
+            if deactivate_missing:
+                job.deactivated_rows = feed.deactivate_missing(db)
+            record_feed_import(db, job)
+            timer.mark("feed")
+        profile.add(timer.take(), batches=0)
         job.status = "completed"
         job.finished_at = datetime.utcnow()
-        db.commit()
-
-        trigger_webhooks_for_event.delay(
-            "product.import.completed",
-            {"job_id": job_id, "processed": processed},
+        add_event(
+            db, "product.import.completed", {"job_id": job_id, "processed": processed}
         )
+        _store_profile(job, profile, profiler)
+        db.commit()
+        _publish_job(job)
+        bump_catalog_version()
 
     except Exception as exc:
+        db.rollback()
+        # The job row holds the counts as of the last committed checkpoint
         job.status = "failed"
         job.error_message = str(exc)
+        job.processed_rows = job.checkpoint_rows or 0
+        job.processed_bytes = processed_bytes
+        ImportCounts.from_job(job).apply(job, job.processed_rows)
         job.finished_at = datetime.utcnow()
+        _store_profile(job, profile, profiler)
         db.commit()
+        _publish_job(job)
+        # Batches committed before the failure are live
+        bump_catalog_version()
         raise
     finally:
         db.close()
 
 
-def _upsert_batch(db, rows: list[dict]):
+def _import_batch(
+    db,
+    batch: ColumnBatch,
+    write_batch,
+    feed: FeedDiff | None,
+    deactivate_missing: bool,
+    timer: PhaseTimer,
+) -> tuple[int, int, int]:
     """
-    Upsert a batch of CSV rows into the products table.
+    Normalize and write one batch; the caller commits.
 
-    - Normalize SKU to upper-case for case-insensitive uniqueness.
-    - Deduplicate within the batch by SKU so ON CONFLICT doesn't hit the same
-      row twice in a single INSERT.
-    - Last occurrence of a SKU inside the batch wins.
+    For feed imports only new or changed rows are written, and their
+    fingerprints are stored in the same transaction so they never run ahead
+    of products. Time goes to the timer's "normalize" and "db" phases.
+    Returns (inserted, updated, skipped).
     """
-    items_by_sku: dict[str, dict] = {}
+    values, skipped = normalize_batch(batch)
+    new_skus: list[str] = []
+    if feed is not None:
+        values, new_skus = feed.changed(values)
+    timer.mark("normalize")
 
-    for r in rows:
-        # Try different capitalizations for CSV headers
-        sku = (r.get("sku") or r.get("SKU") or "").strip()
-        name = (r.get("name") or r.get("Name") or "").strip()
-        description = (r.get("description") or r.get("Description") or "").strip()
-        price_raw = r.get("price") or r.get("Price") or None
+    inserted, updated = write_batch(db, values) if values else (0, 0)
 
-        if not sku or not name:
-            # Skip rows without essential fields
-            continue
+    if feed is not None:
+        feed.store(db, values)
+        if deactivate_missing:
+            # SKUs the feed deactivated earlier come back as new
+            feed.reactivate(db, new_skus)
+    return inserted, updated, skipped
 
-        sku_upper = sku.upper()
 
-        price = None
-        if price_raw:
-            try:
-                price = Decimal(price_raw)
-            except Exception:
-                price = None
+def _store_profile(job: UploadJob, profile: ImportProfile, profiler: cProfile.Profile | None):
+    """Put the run's profile on the job; the caller commits."""
+    if profiler is not None:
+        profiler.disable()
+        profile.extra["cprofile"] = save_cprofile(profiler, job.id)
+    job.profile = profile.as_dict()
 
-        # Last row for a given SKU within this batch wins
-        items_by_sku[sku_upper] = {
-            "sku": sku_upper,
-            "name": name,
-            "description": description,
-            "price": price,
-        }
 
-    values = list(items_by_sku.values())
-    if not values:
-        return
+def _checkpoint(db, job_id: int, offset: int, processed: int, counts: "ImportCounts"):
+    """Record how far the import got, in the caller's transaction."""
+    db.execute(
+        update(UploadJob)
+        .where(UploadJob.id == job_id)
+        .values(
+            checkpoint_offset=offset,
+            checkpoint_rows=processed,
+            inserted_rows=counts.inserted,
+            updated_rows=counts.updated,
+            skipped_rows=counts.skipped,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _skus_before(path: Path, job: UploadJob, offset: int, batch_size: int) -> set[str]:
+    """
+    SKUs in the part of an upload imported before a checkpoint.
 
+    A resumed feed import needs them to tell which products went missing.
+    Reading slightly past the checkpoint is harmless: those rows are about
+    to be imported again anyway.
+    """
+    skus: set[str] = set()
+    with open_upload(path, job.compression) as (lines, _):
+        for batch in iter_upload_batches(lines, job.file_format, batch_size):
+            skus.update(v["sku"] for v in normalize_batch(batch)[0])
+            if lines.offset >= offset:
+                break
+    return skus
+
+
+def _complete_unchanged_feed(db, job: UploadJob):
+    """Finish a feed upload identical to the last one without touching products."""
+    rows = job.total_rows
+    if rows is None:
+        # Not counted at upload (compressed or NDJSON); the same file was
+        # counted by the import it's identical to
+        feed = db.get(ImportFeed, job.feed)
+        last_job = db.get(UploadJob, feed.last_job_id) if feed.last_job_id else None
+        if last_job is not None:
+            rows = last_job.total_rows
+    job.total_rows = rows
+    job.processed_rows = rows or 0
+    job.processed_bytes = job.file_size or 0
+    job.inserted_rows = job.updated_rows = job.skipped_rows = 0
+    job.unchanged_rows = rows
+    job.deactivated_rows = 0
+    job.status = "completed"
+    job.finished_at = datetime.utcnow()
+    add_event(db, "product.import.completed", {"job_id": job.id, "processed": rows})
+    db.commit()
+    _publish_job(job)
+
+
+def _publish_job(job: UploadJob):
+    """Push a job's phase and counters to live progress subscribers."""
+    publish_progress(
+        job.id,
+        status=job.status,
+        processed_rows=job.processed_rows,
+        processed_bytes=job.processed_bytes,
+        total_rows=job.total_rows,
+        error_message=job.error_message,
+    )
+
+
+class ImportCounts:
+    """
+    What an import did to the catalog, accumulated batch by batch.
+
+    Rows that were neither inserted, updated nor skipped as invalid count as
+    unchanged: identical to the stored product, or superseded by a later row
+    for the same SKU.
+    """
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_job(cls, job: UploadJob) -> "ImportCounts":
+        """Counts recorded on the job, e.g. at its last checkpoint."""
+        counts = cls()
+        counts.add(job.inserted_rows or 0, job.updated_rows or 0, job.skipped_rows or 0)
+        return counts
+
+    def add(self, inserted: int, updated: int, skipped: int):
+        self.inserted += inserted
+        self.updated += updated
+        self.skipped += skipped
+
+    def apply(self, job: UploadJob, processed: int):
+        job.inserted_rows = self.inserted
+        job.updated_rows = self.updated
+        job.skipped_rows = self.skipped
+        job.unchanged_rows = max(processed - self.inserted - self.updated - self.skipped, 0)
+
+
+@IMPORT_WRITE_SECONDS.labels("insert").time()
+def _upsert_batch(db, values: list[dict]) -> tuple[int, int]:
+    """
+    Upsert a batch of normalized rows with a multi-row INSERT ... ON CONFLICT.
+
+    The caller commits, together with the job's progress. Returns
+    (inserted, updated) for the batch.
+    """
     stmt = insert(Product).values(values)
     # Conflict on SKU (case-insensitive handled by normalizing to upper-case before insert)
     stmt = stmt.on_conflict_do_update(
@@ -137,6 +476,282 @@ def _upsert_batch(db, rows: list[dict]):
             "price": stmt.excluded.price,
             "updated_at": datetime.utcnow(),
         },
+        where=text(_ROW_CHANGED),
+    ).returning(literal_column("xmax = 0"))
+    inserted_flags = db.execute(stmt).scalars().all()
+    inserted = sum(1 for flag in inserted_flags if flag)
+    return inserted, len(inserted_flags) - inserted
+
+
+@IMPORT_WRITE_SECONDS.labels("copy").time()
+def _copy_batch(db, values: list[dict]) -> tuple[int, int]:
+    """
+    Upsert a batch of normalized rows by streaming them into a temp staging
+    table with COPY, then merging into products with one INSERT ... SELECT.
+
+    The caller commits, which also empties the staging table. Returns
+    (inserted, updated).
+    """
+    db.execute(text(_STAGE_DDL))
+    _copy_rows(
+        db,
+        _STAGE_COPY,
+        ((v["sku"], v["name"], v["description"], v["price"]) for v in values),
     )
-    db.execute(stmt)
+    return tuple(db.execute(text(_STAGE_MERGE)).one())
+
+
+def _copy_rows(db, copy_sql: str, rows):
+    """Stream tuples into Postgres with COPY ... FROM STDIN (csv format)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # An unquoted empty field is NULL in COPY's csv format
+        writer.writerow(["" if v is None else v for v in row])
+    buf.seek(0)
+
+    # Drop down to the psycopg2 connection behind the session's transaction
+    raw = db.connection().connection
+    cur = raw.cursor()
+    try:
+        cur.copy_expert(copy_sql, buf)
+    finally:
+        cur.close()
+
+
+# ----- Sharded imports -----
+
+
+def _start_sharded_import(db, job: UploadJob, path: Path, shards: int):
+    """
+    Split the file into row-aligned byte ranges and fan them out as a chord
+    of shard tasks. finish_sharded_import_task merges once all are done.
+    """
+    with path.open("rb") as raw:
+        lines = OffsetLineReader(raw)
+        header = next(csv.reader(lines), None)
+        header_end = lines.offset
+
+    if not header:
+        job.status = "completed"
+        job.total_rows = 0
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        _publish_job(job)
+        return
+
+    # Fail before fanning out if the header lacks required columns
+    ColumnMapping(header)
+
+    edges = [header_end, *find_row_boundaries(path, header_end, shards), job.file_size]
+    ranges = list(zip(edges, edges[1:]))
+
+    job.shards = len(ranges)
+    job.processed_bytes = header_end
+    job.status = "importing"
     db.commit()
+    _publish_job(job)
+
+    chord(
+        import_products_shard_task.s(job.id, str(path), header, shard, start, end)
+        for shard, (start, end) in enumerate(ranges)
+    )(
+        finish_sharded_import_task.s(job.id).on_error(
+            cleanup_sharded_import_task.si(job.id)
+        )
+    )
+
+
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def import_products_shard_task(
+    job_id: int, file_path: str, header: list[str], shard: int, start: int, end: int
+) -> dict:
+    """
+    Load one byte range of the CSV into product_import_rows.
+
+    Each batch gets seq = (shard << 32) | batch number, so ordering by seq
+    follows file order across shards. Returns the number of CSV rows read,
+    how many of them were skipped as invalid and the shard's profile.
+    """
+    db = SessionLocal()
+    processed = 0
+    skipped = 0
+    profile = ImportProfile()
+    try:
+        # Clear anything left over if this shard is being redelivered
+        db.execute(
+            delete(ProductImportRow).where(
+                ProductImportRow.job_id == job_id,
+                ProductImportRow.seq >= shard << 32,
+                ProductImportRow.seq < (shard + 1) << 32,
+            )
+        )
+        db.commit()
+
+        with Path(file_path).open("rb") as raw:
+            raw.seek(start)
+            lines = OffsetLineReader(raw, start=start, end=end)
+            batches = iter_column_batches(
+                csv.reader(lines), ColumnMapping(header), BATCH_SIZES["copy"]
+            )
+            consumed = start
+            timer = PhaseTimer()
+
+            for batch_no, batch in enumerate(batches):
+                timer.mark("parse")
+                skipped += _stage_shard_batch(
+                    db, job_id, (shard << 32) | batch_no, batch, lines.offset - consumed, timer
+                )
+                phases = timer.take()
+                record_import_batch("sharded", batch.rows, phases)
+                profile.add(phases, batch.rows)
+                processed += batch.rows
+                consumed = lines.offset
+
+            if lines.offset > consumed:
+                # Trailing blank lines still count towards byte progress
+                increment_progress(job_id, 0, lines.offset - consumed)
+
+        profile = profile.as_dict()
+        return {
+            "rows": processed,
+            "skipped": skipped,
+            "phases": profile["phases"],
+            "batches": profile["batches"],
+            "peak_rss_mb": profile["peak_rss_mb"],
+            "rss_growth_mb": profile["rss_growth_mb"],
+        }
+
+    except Exception as exc:
+        db.rollback()
+        error_message = f"Shard {shard}: {exc}"
+        db.execute(
+            update(UploadJob)
+            .where(UploadJob.id == job_id)
+            .values(
+                status="failed",
+                error_message=error_message,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        db.commit()
+        publish_progress(job_id, status="failed", error_message=error_message)
+        raise
+    finally:
+        db.close()
+
+
+def _stage_shard_batch(
+    db, job_id: int, seq: int, batch: ColumnBatch, consumed_bytes: int, timer: PhaseTimer
+) -> int:
+    """
+    COPY one normalized batch into staging and add to the job's live progress.
+    Returns the number of rows skipped as invalid.
+    """
+    values, skipped = normalize_batch(batch)
+    timer.mark("normalize")
+    if values:
+        _copy_rows(
+            db,
+            _SHARD_COPY,
+            ((job_id, seq, v["sku"], v["name"], v["description"], v["price"]) for v in values),
+        )
+        timer.mark("db")
+        db.commit()
+        timer.mark("commit")
+    increment_progress(job_id, batch.rows, consumed_bytes)
+    timer.mark("progress")
+    return skipped
+
+
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def finish_sharded_import_task(shard_results: list[dict], job_id: int):
+    """Chord callback: merge staged rows into products and complete the job."""
+    db = SessionLocal()
+    job = db.get(UploadJob, job_id)
+    if not job or job.status == "completed":
+        db.close()
+        return
+
+    profile = ImportProfile(job.profile)
+    for r in shard_results:
+        # Shard time is summed over shards, so it can exceed elapsed_seconds
+        profile.add(r.get("phases", {}), batches=r.get("batches", 0))
+        # Shards may share a process or not; report the largest of each
+        profile.merge_rss(r.get("peak_rss_mb"), r.get("rss_growth_mb"))
+
+    try:
+        job.status = "merging"
+        db.commit()
+        _publish_job(job)
+
+        # Merge, clean up staging and complete the job in one transaction
+        timer = PhaseTimer()
+        inserted, updated = db.execute(text(_SHARD_MERGE), {"job_id": job_id}).one()
+        db.execute(delete(ProductImportRow).where(ProductImportRow.job_id == job_id))
+        timer.mark("merge")
+
+        processed = sum(r["rows"] for r in shard_results)
+        profile.add(timer.take(), processed, batches=0)
+        counts = ImportCounts()
+        counts.add(inserted, updated, sum(r["skipped"] for r in shard_results))
+        counts.apply(job, processed)
+        job.processed_rows = processed
+        job.total_rows = processed
+        job.processed_bytes = job.file_size
+        job.status = "completed"
+        job.finished_at = datetime.utcnow()
+        add_event(
+            db, "product.import.completed", {"job_id": job_id, "processed": processed}
+        )
+        job.profile = profile.as_dict(elapsed=_wall_seconds(job))
+        db.commit()
+        _publish_job(job)
+        bump_catalog_version()
+
+    except Exception as exc:
+        db.rollback()
+        job.status = "failed"
+        job.error_message = str(exc)
+        job.finished_at = datetime.utcnow()
+        job.profile = profile.as_dict(elapsed=_wall_seconds(job))
+        db.commit()
+        _publish_job(job)
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def cleanup_sharded_import_task(job_id: int):
+    """
+    Chord error callback: drop the rows staged by a sharded import that failed.
+
+    Celery runs it once every shard has returned, so no shard is still
+    writing. The job is marked failed if no task did so, leaving it ready
+    for resume_upload.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(delete(ProductImportRow).where(ProductImportRow.job_id == job_id))
+        job = db.get(UploadJob, job_id)
+        if job is not None and job.status in ("importing", "merging"):
+            job.status = "failed"
+            job.error_message = job.error_message or "Sharded import failed"
+            job.finished_at = datetime.utcnow()
+        db.commit()
+        if job is not None:
+            _publish_job(job)
+    finally:
+        db.close()
+
+
+def _wall_seconds(job: UploadJob) -> float | None:
+    """Time since the job started, across all the tasks it ran in."""
+    started = job.started_at
+    if started is None:
+        return None
+    if started.tzinfo is not None:
+        # Loaded from the database; the job's own timestamps are naive UTC
+        started = started.astimezone(timezone.utc).replace(tzinfo=None)
+    return (datetime.utcnow() - started).total_seconds()
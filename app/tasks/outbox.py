@@ -0,0 +1,71 @@
+from celery.utils.log import get_task_logger
+from kombu.exceptions import OperationalError
+from sqlalchemy import delete, update
+
+from app.celery_app import celery_app
+from app.config import OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from app.database import SessionLocal
+from app.models import OutboxEvent
+from app.tasks.webhooks import trigger_webhooks_for_event
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def relay_outbox():
+    """
+    Drain outbox_events into the webhook pipeline, OUTBOX_BATCH_SIZE at a time.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED so overlapping relays never
+    double-send, and deleted in the same transaction once dispatched. If the
+    broker is down the transaction rolls back and the events wait for the
+    next run (delivery is at-least-once). Any other error only holds back
+    the event that raised it: its attempt count goes up, and after
+    OUTBOX_MAX_ATTEMPTS it is skipped so it can't stall the events behind it.
+    """
+    db = SessionLocal()
+    relayed = 0
+    failed = 0
+    try:
+        while True:
+            events = (
+                db.query(OutboxEvent)
+                .filter(OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS)
+                .order_by(OutboxEvent.id)
+                .limit(OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not events:
+                break
+
+            dispatched = []
+            for event in events:
+                try:
+                    # Runs inline: subscriber lookup plus enqueueing deliveries
+                    trigger_webhooks_for_event(event.event_type, event.payload)
+                except OperationalError:
+                    raise
+                except Exception as exc:
+                    logger.exception("Outbox event %s (%s) failed", event.id, event.event_type)
+                    db.execute(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id == event.id)
+                        .values(attempts=OutboxEvent.attempts + 1, last_error=repr(exc))
+                    )
+                    failed += 1
+                else:
+                    dispatched.append(event.id)
+
+            if dispatched:
+                db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(dispatched)))
+            db.commit()
+            relayed += len(dispatched)
+            if len(dispatched) < len(events):
+                # Failed events are retried on the next run, not in this loop
+                break
+    finally:
+        db.close()
+
+    if relayed or failed:
+        logger.info("Relayed %d outbox events, %d failed", relayed, failed)
@@ -1,52 +1,156 @@
 import time
+from collections import defaultdict
 from typing import Any, Dict
 
+import redis
 from celery.utils.log import get_task_logger
-import requests
-from sqlalchemy import func
+from sqlalchemy import update
 
 from app.celery_app import celery_app
+from app.config import (
+    WEBHOOK_BATCH_MAX_WINDOW,
+    WEBHOOK_DELIVERY_BATCH_SIZE,
+    WEBHOOK_PARK_MAX_SECONDS,
+    WEBHOOK_RETRY_MAX_ATTEMPTS,
+)
 from app.database import SessionLocal
+from app.metrics import record_webhook_results
 from app.models import Webhook
+from app.webhook_batching import add_to_batch, take_batch
+from app.webhook_breaker import backoff_delay, gate, is_failure, record
+from app.webhook_delivery import get_engine
+from app.webhook_registry import normalize_event_type, registry
 
 logger = get_task_logger(__name__)
 
 
 @celery_app.task
-def send_webhook_request(
-    webhook_id: int, url: str, event_type: str, payload: Dict[str, Any]
-):
+def deliver_webhooks(deliveries: list[Dict[str, Any]]):
     """
-    Actually send the HTTP POST to the webhook URL and record status/latency.
+    Deliver a batch of webhook calls concurrently through the pooled engine,
+    then record the last status/latency per webhook in one transaction.
+
+    Each delivery is a dict with webhook_id, url, event_type and payload,
+    plus an attempt counter once retried. Deliveries to webhooks whose
+    circuit is open are parked without a request; retryable failures and
+    parked deliveries are rescheduled with backoff, never slept on here.
+    Manual (test) deliveries bypass the breaker and aren't retried.
     """
-    start = time.time()
-    status_code: int | None = None
+    if not deliveries:
+        return
 
-    try:
-        resp = requests.post(
-            url,
-            json={"event_type": event_type, "payload": payload},
-            timeout=5,
-        )
-        status_code = resp.status_code
-        logger.info("Webhook %s -> %s responded with %s", webhook_id, url, status_code)
-    except Exception as exc:
-        logger.warning("Webhook %s -> %s failed: %r", webhook_id, url, exc)
+    manual = [d for d in deliveries if d.get("manual")]
+    allowed, parked = gate([d for d in deliveries if not d.get("manual")])
 
-    duration_ms = int((time.time() - start) * 1000)
+    results = get_engine().deliver_many(manual + allowed)
+    record(results)
+    record_webhook_results(results)
 
-    # Save last_status_code and last_response_ms on the webhook row
+    last_by_hook: dict[int, dict] = {}
+    retry = [(d, wait, False) for d, wait in parked]
+    for r in results:
+        if r["error"]:
+            logger.warning("Webhook %s -> %s failed: %s", r["webhook_id"], r["url"], r["error"])
+        else:
+            logger.info(
+                "Webhook %s -> %s responded with %s", r["webhook_id"], r["url"], r["status_code"]
+            )
+        if is_failure(r) and not r.get("manual"):
+            retry.append((_delivery_of(r), 0, True))
+        last_by_hook[r["webhook_id"]] = {
+            "id": r["webhook_id"],
+            "last_test_status_code": r["status_code"],
+            "last_test_response_time_ms": r["duration_ms"],
+            "last_test_error": r["error"],
+        }
+
+    if last_by_hook:
+        _record_results(list(last_by_hook.values()))
+    _reschedule(retry)
+
+
+def _delivery_of(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        k: result[k]
+        for k in ("webhook_id", "url", "event_type", "payload", "attempt", "parked_since")
+        if k in result
+    }
+
+
+def _reschedule(items: list[tuple[Dict[str, Any], float, bool]]):
+    """
+    Queue deliveries again; each item is (delivery, wait, attempted).
+
+    A failed attempt waits max(wait, backoff for its attempt) and is dropped
+    with a warning after WEBHOOK_RETRY_MAX_ATTEMPTS. A parked delivery made
+    no request, so it keeps its attempt number and just waits out the
+    circuit; it is dropped once it was first parked WEBHOOK_PARK_MAX_SECONDS
+    ago. Deliveries due at the same second share one task.
+    """
+    now = time.time()
+    by_countdown: dict[int, list[Dict[str, Any]]] = defaultdict(list)
+    for delivery, wait, attempted in items:
+        attempt = delivery.get("attempt", 1)
+        if not attempted:
+            parked_since = delivery.get("parked_since", now)
+            if now - parked_since >= WEBHOOK_PARK_MAX_SECONDS:
+                logger.warning(
+                    "Giving up on webhook %s (%s) after its circuit stayed open for %ds",
+                    delivery["webhook_id"],
+                    delivery["event_type"],
+                    now - parked_since,
+                )
+                continue
+            by_countdown[int(wait) + 1].append({**delivery, "parked_since": parked_since})
+            continue
+        if attempt >= WEBHOOK_RETRY_MAX_ATTEMPTS:
+            logger.warning(
+                "Giving up on webhook %s (%s) after %d attempts",
+                delivery["webhook_id"],
+                delivery["event_type"],
+                attempt,
+            )
+            continue
+        countdown = int(max(wait, backoff_delay(attempt))) + 1
+        by_countdown[countdown].append({**delivery, "attempt": attempt + 1})
+
+    for countdown, batch in by_countdown.items():
+        deliver_webhooks.apply_async((batch,), countdown=countdown)
+
+
+def _record_results(rows: list[dict]):
+    """Bulk UPDATE webhooks by primary key with their latest delivery outcome."""
     db = SessionLocal()
     try:
-        hook = db.get(Webhook, webhook_id)
-        if hook:
-            hook.last_status_code = status_code
-            hook.last_response_ms = duration_ms
+        existing = {
+            hook_id
+            for (hook_id,) in db.query(Webhook.id).filter(
+                Webhook.id.in_([r["id"] for r in rows])
+            )
+        }
+        rows = [r for r in rows if r["id"] in existing]
+        if rows:
+            db.execute(update(Webhook), rows)
             db.commit()
     finally:
         db.close()
 
 
+@celery_app.task
+def send_webhook_request(
+    webhook_id: int, url: str, event_type: str, payload: Dict[str, Any]
+):
+    """
+    Send a single webhook POST and record status/latency.
+
+    Kept for messages already queued; new deliveries go through
+    deliver_webhooks in batches.
+    """
+    deliver_webhooks(
+        [{"webhook_id": webhook_id, "url": url, "event_type": event_type, "payload": payload}]
+    )
+
+
 @celery_app.task
 def test_webhook_task(webhook_id: int):
     """
@@ -59,15 +163,18 @@ def test_webhook_task(webhook_id: int):
         if not hook or not hook.enabled:
             return
 
-        send_webhook_request.delay(
-            hook.id,
-            hook.url,
-            "webhook.test",
-            {"message": "test from product-importer"},
-        )
+        delivery = {
+            "webhook_id": hook.id,
+            "url": hook.url,
+            "event_type": "webhook.test",
+            "payload": {"message": "test from product-importer"},
+            "manual": True,
+        }
     finally:
         db.close()
 
+    deliver_webhooks([delivery])
+
 
 @celery_app.task
 def trigger_webhooks_for_event(event_type: str, payload: Dict[str, Any]):
@@ -75,27 +182,82 @@ def trigger_webhooks_for_event(event_type: str, payload: Dict[str, Any]):
     Trigger all enabled webhooks matching a given event_type.
 
     - event_type comparison is case-insensitive.
-    - Each matching webhook gets its own send_webhook_request task.
+    - Subscribers come from the in-process registry, so steady-state
+      dispatch needs no database round-trip.
+    - Webhooks in batching mode get the event buffered instead (see
+      _buffer_event); the rest are split into batches of
+      WEBHOOK_DELIVERY_BATCH_SIZE, each delivered concurrently by one
+      deliver_webhooks task.
     """
-    db = SessionLocal()
+    hooks = registry.subscribers(event_type)
+
+    logger.info(
+        "Triggering %d webhooks for event '%s'", len(hooks), normalize_event_type(event_type)
+    )
+
+    deliveries = []
+    for h in hooks:
+        if h.get("batch_window_seconds") and _buffer_event(h, event_type, payload):
+            continue
+        deliveries.append(
+            {
+                "webhook_id": h["webhook_id"],
+                "url": h["url"],
+                "event_type": event_type,
+                "payload": payload,
+            }
+        )
+    for i in range(0, len(deliveries), WEBHOOK_DELIVERY_BATCH_SIZE):
+        deliver_webhooks.delay(deliveries[i : i + WEBHOOK_DELIVERY_BATCH_SIZE])
+
+
+def _buffer_event(hook: Dict[str, Any], event_type: str, payload: Dict[str, Any]) -> bool:
+    """
+    Add an event to a batching webhook's buffer in Redis.
+
+    The first event of a window schedules flush_webhook_batch after
+    batch_window_seconds; reaching batch_max_events flushes right away.
+    Returns False if Redis is unavailable so the caller delivers directly.
+    """
+    window = min(hook["batch_window_seconds"], WEBHOOK_BATCH_MAX_WINDOW)
     try:
-        key = event_type.strip().lower()
+        size, opened = add_to_batch(
+            hook["webhook_id"], event_type, payload, ttl=max(window * 3, 60)
+        )
+    except redis.RedisError as exc:
+        logger.warning("Can't buffer event for webhook %s: %r", hook["webhook_id"], exc)
+        return False
 
-        hooks = (
-            db.query(Webhook)
-            .filter(Webhook.enabled.is_(True))
-            .filter(func.lower(Webhook.event_type) == key)
-            .all()
+    max_events = hook.get("batch_max_events")
+    if max_events and size >= max_events:
+        flush_webhook_batch.delay(hook["webhook_id"], hook["url"], event_type)
+    elif opened:
+        flush_webhook_batch.apply_async(
+            (hook["webhook_id"], hook["url"], event_type), countdown=window
         )
+    return True
 
-        logger.info("Triggering %d webhooks for event '%s'", len(hooks), key)
 
-        for hook in hooks:
-            send_webhook_request.delay(
-                hook.id,
-                hook.url,
-                event_type,
-                payload,
-            )
-    finally:
-        db.close()
+@celery_app.task
+def flush_webhook_batch(webhook_id: int, url: str, event_type: str):
+    """
+    Send a batching webhook everything buffered for event_type as one call.
+
+    The payload is {"batch": true, "count": n, "events": [...]}, where
+    repeated changes to the same product have collapsed to the latest one.
+    A flush that finds the buffer already drained does nothing.
+    """
+    events = take_batch(webhook_id, event_type)
+    if not events:
+        return
+
+    deliver_webhooks(
+        [
+            {
+                "webhook_id": webhook_id,
+                "url": url,
+                "event_type": event_type,
+                "payload": {"batch": True, "count": len(events), "events": events},
+            }
+        ]
+    )
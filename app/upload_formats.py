@@ -0,0 +1,107 @@
+import csv
+import gzip
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from app.csv_columns import ColumnBatch, ColumnMapping, iter_column_batches, iter_ndjson_batches
+from app.csv_utils import OffsetLineReader
+
+# Extension -> (file_format, compression), longest match first
+EXTENSIONS = (
+    (".csv.gz", "csv", "gzip"),
+    (".ndjson.gz", "ndjson", "gzip"),
+    (".jsonl.gz", "ndjson", "gzip"),
+    (".csv", "csv", None),
+    (".ndjson", "ndjson", None),
+    (".jsonl", "ndjson", None),
+    (".zip", None, "zip"),  # format comes from the archive member's name
+)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def detect_format(filename: str) -> tuple[Optional[str], Optional[str], str]:
+    """
+    Return (file_format, compression, extension) for an upload's filename.
+
+    file_format is None for zip archives until the member is inspected.
+    Raises ValueError for unsupported names.
+    """
+    name = filename.lower()
+    for extension, file_format, compression in EXTENSIONS:
+        if name.endswith(extension):
+            return file_format, compression, extension
+    supported = ", ".join(e for e, _, _ in EXTENSIONS)
+    raise ValueError(f"Unsupported file type; expected one of: {supported}")
+
+
+def _zip_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    members = [m for m in archive.infolist() if not m.is_dir()]
+    if len(members) != 1:
+        raise ValueError(f"Zip uploads must contain exactly one file, found {len(members)}")
+    return members[0]
+
+
+def inspect_zip(path: Path) -> str:
+    """Validate a stored zip upload and return the format of its single member."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            member = _zip_member(archive)
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"Not a valid zip file: {exc}") from exc
+
+    file_format, compression, _ = detect_format(member.filename)
+    if file_format is None or compression is not None:
+        raise ValueError(f"Unsupported file inside zip: {member.filename}")
+    return file_format
+
+
+@contextmanager
+def open_upload(
+    path: Path, compression: Optional[str] = None
+) -> Iterator[tuple[OffsetLineReader, Callable[[], int]]]:
+    """
+    Open a stored upload for a single streaming pass, decompressing on the fly.
+
+    Yields (lines, consumed): an OffsetLineReader over the decompressed
+    content, and a function returning how many bytes of the stored file
+    have been read so far. Progress is measured in stored bytes so it stays
+    comparable with file_size; for compressed files that's the position in
+    the compressed stream (rounded up to the decompressor's read-ahead).
+    """
+    with path.open("rb") as raw:
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=raw) as stream:
+                yield OffsetLineReader(stream), raw.tell
+        elif compression == "zip":
+            with zipfile.ZipFile(raw) as archive:
+                with archive.open(_zip_member(archive)) as stream:
+                    yield OffsetLineReader(stream), raw.tell
+        else:
+            lines = OffsetLineReader(raw)
+            yield lines, lambda: lines.offset
+
+
+def iter_upload_batches(
+    lines: OffsetLineReader, file_format: Optional[str], batch_size: int, start: int = 0
+) -> Iterator[ColumnBatch]:
+    """
+    Parse decompressed upload lines (CSV by default) into ColumnBatches.
+
+    `start` resumes from a checkpoint: a row boundary in the decompressed
+    content. CSV still reads its header from the top first.
+    """
+    if file_format == "ndjson":
+        if start:
+            lines.seek(start)
+        return iter_ndjson_batches(lines, batch_size)
+
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return iter(())
+    if start > lines.offset:
+        lines.seek(start)
+    return iter_column_batches(reader, ColumnMapping(header), batch_size)
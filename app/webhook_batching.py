@@ -0,0 +1,53 @@
+import json
+import time
+import uuid
+from typing import Any, Dict
+
+from app.redis_client import redis_client
+from app.webhook_registry import normalize_event_type
+
+
+def _keys(webhook_id: int, event_type: str) -> tuple[str, str]:
+    base = f"webhook_batch:{webhook_id}:{normalize_event_type(event_type)}"
+    return f"{base}:events", f"{base}:scheduled"
+
+
+def collapse_key(payload: Dict[str, Any]) -> str:
+    """Events about the same product share a key, so the latest state wins."""
+    if isinstance(payload, dict) and payload.get("id") is not None:
+        return f"id:{payload['id']}"
+    return f"event:{uuid.uuid4().hex}"
+
+
+def add_to_batch(
+    webhook_id: int, event_type: str, payload: Dict[str, Any], ttl: int
+) -> tuple[int, bool]:
+    """
+    Buffer one event for a batching webhook.
+
+    Returns the number of events now buffered and whether this call opened
+    the window, in which case the caller must schedule the flush.
+    """
+    events_key, scheduled_key = _keys(webhook_id, event_type)
+    entry = json.dumps({"ts": time.time(), "payload": payload})
+
+    pipe = redis_client.pipeline()
+    pipe.hset(events_key, collapse_key(payload), entry)
+    pipe.expire(events_key, ttl)
+    pipe.hlen(events_key)
+    pipe.set(scheduled_key, "1", nx=True, ex=ttl)
+    _, _, size, opened = pipe.execute()
+    return size, bool(opened)
+
+
+def take_batch(webhook_id: int, event_type: str) -> list[Dict[str, Any]]:
+    """Atomically remove and return the buffered payloads, oldest change first."""
+    events_key, scheduled_key = _keys(webhook_id, event_type)
+
+    pipe = redis_client.pipeline()
+    pipe.hgetall(events_key)
+    pipe.delete(events_key, scheduled_key)
+    raw, _ = pipe.execute()
+
+    entries = sorted((json.loads(v) for v in raw.values()), key=lambda e: e["ts"])
+    return [e["payload"] for e in entries]
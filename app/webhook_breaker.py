@@ -0,0 +1,188 @@
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping
+from urllib.parse import urlsplit
+
+import redis
+
+from app.config import (
+    WEBHOOK_BREAKER_COOLDOWN_SECONDS,
+    WEBHOOK_BREAKER_FAILURE_THRESHOLD,
+    WEBHOOK_RETRY_BASE_DELAY,
+    WEBHOOK_RETRY_MAX_DELAY,
+    WEBHOOK_TIMEOUT,
+)
+from app.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Count a failure and open (or re-open) the circuit once the threshold is
+# reached, or straight away if it was already open (a failed probe).
+_FAILURE_SCRIPT = redis_client.register_script(
+    """
+    local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+    local state = redis.call('HGET', KEYS[1], 'state')
+    if failures >= tonumber(ARGV[1]) or state == 'open' then
+        redis.call('HSET', KEYS[1], 'state', 'open', 'open_until', ARGV[2])
+    end
+    redis.call('DEL', KEYS[2])
+    return failures
+    """
+)
+
+
+def endpoint_of(url: str) -> str:
+    """
+    The endpoint a breaker tracks: scheme, host and port of a webhook URL.
+
+    Webhooks sharing a receiver share its breaker, so a dead host opens one
+    circuit rather than taking failures for every webhook pointing at it.
+    """
+    parts = urlsplit(url.strip())
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def _key(endpoint: str) -> str:
+    return f"webhook_breaker:{endpoint}"
+
+
+def _probe_key(endpoint: str) -> str:
+    return f"webhook_breaker:{endpoint}:probe"
+
+
+def is_failure(result: Dict[str, Any]) -> bool:
+    """Connection errors, timeouts, 5xx and 429 count against the endpoint and are retried."""
+    status = result["status_code"]
+    return status is None or status >= 500 or status == 429
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given (1-based) attempt number."""
+    delay = min(WEBHOOK_RETRY_BASE_DELAY * 2 ** (attempt - 1), WEBHOOK_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _fetch(endpoints: list[str]) -> list[dict]:
+    pipe = redis_client.pipeline(transaction=False)
+    for endpoint in endpoints:
+        pipe.hgetall(_key(endpoint))
+    return pipe.execute()
+
+
+def _describe(raw: dict, now: float) -> Dict[str, Any]:
+    state = raw.get("state") or CLOSED
+    open_until = float(raw["open_until"]) if raw.get("open_until") else None
+    if state == OPEN and open_until is not None and open_until <= now:
+        state = HALF_OPEN
+    return {
+        "state": state,
+        "failures": int(raw.get("failures") or 0),
+        "open_until": open_until if state == OPEN else None,
+    }
+
+
+async def breaker_states_async(urls: Mapping[int, str]) -> dict[int, Dict[str, Any]]:
+    """
+    Current breaker state per webhook (given as {webhook_id: url}) for
+    display: state, consecutive failures of its endpoint and, while open,
+    when it will let a probe through. Empty if Redis is unavailable.
+    """
+    webhook_ids = list(urls)
+    try:
+        pipe = async_redis_client.pipeline(transaction=False)
+        for webhook_id in webhook_ids:
+            pipe.hgetall(_key(endpoint_of(urls[webhook_id])))
+        raws = await pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Can't read webhook breaker state: %r", exc)
+        return {}
+    return _display_states(webhook_ids, raws)
+
+
+def _display_states(webhook_ids: list[int], raws: list[dict]) -> dict[int, Dict[str, Any]]:
+    now = time.time()
+    states = {}
+    for webhook_id, raw in zip(webhook_ids, raws):
+        info = _describe(raw, now)
+        if info["open_until"] is not None:
+            info["open_until"] = datetime.fromtimestamp(info["open_until"], tz=timezone.utc)
+        states[webhook_id] = info
+    return states
+
+
+def gate(
+    deliveries: list[Dict[str, Any]],
+) -> tuple[list[Dict[str, Any]], list[tuple[Dict[str, Any], float]]]:
+    """
+    Split deliveries into those that may go out now and those to park.
+
+    Open circuits park their deliveries until the cooldown ends. Once it has,
+    the circuit is half-open: exactly one delivery (the probe) goes through
+    per endpoint and the rest wait for its outcome. Parked items come back
+    with the number of seconds to wait. If Redis is unavailable everything
+    is let through.
+    """
+    if not deliveries:
+        return [], []
+
+    endpoints = sorted({endpoint_of(d["url"]) for d in deliveries})
+    try:
+        raws = _fetch(endpoints)
+    except redis.RedisError as exc:
+        logger.warning("Can't read webhook breaker state, delivering anyway: %r", exc)
+        return deliveries, []
+
+    now = time.time()
+    states = {e: _describe(raw, now) for e, raw in zip(endpoints, raws)}
+    probing: dict[str, bool] = {}
+
+    allowed, parked = [], []
+    for d in deliveries:
+        endpoint = endpoint_of(d["url"])
+        info = states[endpoint]
+        if info["state"] == CLOSED:
+            allowed.append(d)
+        elif info["state"] == OPEN:
+            parked.append((d, info["open_until"] - now))
+        else:
+            if endpoint not in probing:
+                probing[endpoint] = _claim_probe(endpoint)
+                if probing[endpoint]:
+                    allowed.append(d)
+                    continue
+            parked.append((d, WEBHOOK_TIMEOUT * 2))
+    return allowed, parked
+
+
+def _claim_probe(endpoint: str) -> bool:
+    # Expires on its own in case the probing worker dies mid-request
+    ttl = int(WEBHOOK_TIMEOUT * 4) + 1
+    try:
+        return bool(redis_client.set(_probe_key(endpoint), "1", nx=True, ex=ttl))
+    except redis.RedisError:
+        return True
+
+
+def record(results: list[Dict[str, Any]]):
+    """Update each endpoint's breaker with the outcome of its latest deliveries."""
+    try:
+        for r in results:
+            endpoint = endpoint_of(r["url"])
+            if is_failure(r):
+                _FAILURE_SCRIPT(
+                    keys=[_key(endpoint), _probe_key(endpoint)],
+                    args=[
+                        WEBHOOK_BREAKER_FAILURE_THRESHOLD,
+                        time.time() + WEBHOOK_BREAKER_COOLDOWN_SECONDS,
+                    ],
+                )
+            else:
+                redis_client.delete(_key(endpoint), _probe_key(endpoint))
+    except redis.RedisError as exc:
+        logger.warning("Can't update webhook breaker state: %r", exc)
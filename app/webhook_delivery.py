@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_PER_HOST_CONCURRENCY,
+    WEBHOOK_TIMEOUT,
+)
+
+
+class DeliveryEngine:
+    """
+    Deliver webhook POSTs concurrently over pooled keep-alive connections.
+
+    One engine lives in each worker process. A bounded thread pool runs the
+    deliveries and a shared requests.Session reuses TCP/TLS connections. At
+    most per_host_concurrency deliveries per host are handed to the pool at
+    a time; the rest wait in a per-host queue rather than in pool threads,
+    so a slow receiver can't hold up deliveries to the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+        per_host_concurrency: int = WEBHOOK_PER_HOST_CONCURRENCY,
+        timeout: float = WEBHOOK_TIMEOUT,
+    ):
+        self.timeout = timeout
+        self.per_host_concurrency = per_host_concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_concurrency,
+            pool_maxsize=max_concurrency,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="webhook"
+        )
+        # Deliveries handed to the pool, and those waiting for a slot, per host
+        self._in_flight: dict[str, int] = defaultdict(int)
+        self._waiting: dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def deliver_many(self, deliveries: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """
+        Send every delivery and wait for all of them.
+
+        Each delivery is a dict with webhook_id, url, event_type and payload.
+        Returns one result per delivery, in the same order, with status_code,
+        duration_ms and error.
+        """
+        futures = [self._submit(d) for d in deliveries]
+        return [f.result() for f in futures]
+
+    def _submit(self, delivery: Dict[str, Any]) -> Future:
+        """Hand a delivery to the pool if its host has a free slot, else queue it."""
+        future: Future = Future()
+        host = urlsplit(delivery["url"]).netloc
+        with self._lock:
+            if self._in_flight[host] >= self.per_host_concurrency:
+                self._waiting[host].append((delivery, future))
+                return future
+            self._in_flight[host] += 1
+        self.executor.submit(self._run, host, delivery, future)
+        return future
+
+    def _run(self, host: str, delivery: Dict[str, Any], future: Future):
+        try:
+            future.set_result(self.deliver(delivery))
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            self._release(host)
+
+    def _release(self, host: str):
+        """Pass a finished delivery's slot to the next one queued for its host."""
+        with self._lock:
+            waiting = self._waiting.get(host)
+            if waiting:
+                delivery, future = waiting.popleft()
+            else:
+                self._waiting.pop(host, None)
+                self._in_flight[host] -= 1
+                if not self._in_flight[host]:
+                    del self._in_flight[host]
+                return
+        self.executor.submit(self._run, host, delivery, future)
+
+    def deliver(self, delivery: Dict[str, Any]) -> Dict[str, Any]:
+        url = delivery["url"]
+        status_code: Optional[int] = None
+        error: Optional[str] = None
+
+        start = time.perf_counter()
+        try:
+            resp = self.session.post(
+                url,
+                json={"event_type": delivery["event_type"], "payload": delivery["payload"]},
+                timeout=self.timeout,
+            )
+            status_code = resp.status_code
+            # Drain the body so the connection goes back to the pool
+            resp.content
+        except Exception as exc:
+            # Anything else (e.g. a payload that isn't JSON-serializable) is
+            # this delivery's failure, not the whole batch's
+            error = repr(exc)
+        duration_ms = int((time.perf_counter() - start) * 1000)
+
+        return {
+            **delivery,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "error": error,
+        }
+
+
+_engine: Optional[DeliveryEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> DeliveryEngine:
+    """
+    Return this process's engine, creating it on first use.
+
+    Created lazily so each forked Celery worker process gets its own pool
+    and threads rather than inheriting the parent's.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = DeliveryEngine()
+    return _engine
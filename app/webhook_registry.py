@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import redis
+from sqlalchemy import func
+
+from app.config import WEBHOOK_REGISTRY_CHECK_SECONDS
+from app.database import SessionLocal
+from app.models import Webhook
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Bumped by the webhook CRUD routes whenever a row changes
+WEBHOOKS_VERSION_KEY = "webhooks:version"
+
+
+def normalize_event_type(event_type: str) -> str:
+    return event_type.strip().lower()
+
+
+def bump_webhooks_version():
+    """Invalidate every worker's subscription registry. Call after a webhook write commits."""
+    try:
+        redis_client.incr(WEBHOOKS_VERSION_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Could not bump webhooks version: %r", exc)
+
+
+class SubscriptionRegistry:
+    """
+    In-process cache of enabled webhooks, keyed by normalized event type.
+
+    Subscribers for an event type are loaded on first use (served by the
+    lower(event_type) partial index) and kept until the webhooks version in
+    Redis changes. The version is checked at most every
+    WEBHOOK_REGISTRY_CHECK_SECONDS, so steady-state dispatch touches neither
+    Postgres nor, most of the time, Redis.
+    """
+
+    def __init__(self, check_seconds: float = WEBHOOK_REGISTRY_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._by_event: dict[str, list[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribers(self, event_type: str) -> list[Dict[str, Any]]:
+        key = normalize_event_type(event_type)
+        with self._lock:
+            self._check_version()
+            hooks = self._by_event.get(key)
+            if hooks is None:
+                hooks = self._load(key)
+                if self._version is not None:
+                    # Only cache while invalidation works
+                    self._by_event[key] = hooks
+            return hooks
+
+    def clear(self):
+        with self._lock:
+            self._by_event.clear()
+            self._version = None
+            self._checked_at = 0.0
+
+    def _check_version(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_seconds:
+            return
+        try:
+            version = redis_client.get(WEBHOOKS_VERSION_KEY) or "0"
+        except redis.RedisError as exc:
+            logger.warning("Webhook registry can't reach Redis, reading from DB: %r", exc)
+            version = None
+        if version is None or version != self._version:
+            self._by_event.clear()
+        self._version = version
+        self._checked_at = now
+
+    def _load(self, key: str) -> list[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            hooks = (
+                db.query(Webhook)
+                .filter(Webhook.enabled.is_(True))
+                .filter(func.lower(Webhook.event_type) == key)
+                .order_by(Webhook.id)
+                .all()
+            )
+            return [_subscription(h) for h in hooks]
+        finally:
+            db.close()
+
+
+def _subscription(hook: Webhook) -> Dict[str, Any]:
+    return {
+        "webhook_id": hook.id,
+        "url": hook.url,
+        "batch_window_seconds": hook.batch_window_seconds,
+        "batch_max_events": hook.batch_max_events,
+    }
+
+
+registry = SubscriptionRegistry()
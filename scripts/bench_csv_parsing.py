@@ -0,0 +1,165 @@
+"""
+Micro-benchmark: CSV parsing + normalization, DictReader path vs column path.
+
+Generates a synthetic catalog in memory and runs both parsers over it without
+touching the database:
+
+    python scripts/bench_csv_parsing.py --rows 200000 --batch-size 2000
+
+Reports rows/sec (best of --repeat runs), peak memory traced during a full
+run per row of one batch (tracemalloc), and heap blocks held per row by one
+parsed batch before normalization (sys.getallocatedblocks).
+"""
+import argparse
+import csv
+import gc
+import io
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.csv_columns import ColumnMapping, iter_column_batches, normalize_batch  # noqa: E402
+
+
+def make_csv(rows: int) -> str:
+    rnd = random.Random(42)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["sku", "name", "description", "price"])
+    for i in range(rows):
+        writer.writerow(
+            [
+                f"sku-{rnd.randrange(rows * 2)}",
+                f"Product {i}",
+                "A reasonably long product description, with a comma" if i % 3 else "",
+                f"{rnd.randrange(1, 100000) / 100:.2f}" if i % 50 else "N/A",
+            ]
+        )
+    return buf.getvalue()
+
+
+def legacy_normalize(rows: list[dict]) -> tuple[list[dict], int]:
+    """The per-row dict path the importer used before the column engine."""
+    items_by_sku: dict[str, dict] = {}
+    skipped = 0
+    for r in rows:
+        sku = (r.get("sku") or r.get("SKU") or "").strip()
+        name = (r.get("name") or r.get("Name") or "").strip()
+        description = (r.get("description") or r.get("Description") or "").strip()
+        price_raw = r.get("price") or r.get("Price") or None
+        if not sku or not name:
+            skipped += 1
+            continue
+        sku_upper = sku.upper()
+        price = None
+        if price_raw:
+            try:
+                price = Decimal(price_raw)
+            except Exception:
+                price = None
+        items_by_sku[sku_upper] = {
+            "sku": sku_upper,
+            "name": name,
+            "description": description,
+            "price": price,
+        }
+    return list(items_by_sku.values()), skipped
+
+
+def run_legacy(f, batch_size: int) -> int:
+    reader = csv.DictReader(f)
+    batch: list[dict] = []
+    total = 0
+    for row in reader:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += len(legacy_normalize(batch)[0])
+            batch.clear()
+    if batch:
+        total += len(legacy_normalize(batch)[0])
+    return total
+
+
+def run_columns(f, batch_size: int) -> int:
+    reader = csv.reader(f)
+    mapping = ColumnMapping(next(reader))
+    return sum(
+        len(normalize_batch(batch)[0])
+        for batch in iter_column_batches(reader, mapping, batch_size)
+    )
+
+
+def parse_legacy_batch(f, batch_size: int):
+    reader = csv.DictReader(f)
+    return [row for _, row in zip(range(batch_size), reader)]
+
+
+def parse_columns_batch(f, batch_size: int):
+    reader = csv.reader(f)
+    mapping = ColumnMapping(next(reader))
+    return next(iter_column_batches(reader, mapping, batch_size))
+
+
+def rows_per_second(fn, text: str, rows: int, batch_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        f = io.StringIO(text)
+        start = time.perf_counter()
+        fn(f, batch_size)
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def peak_bytes_per_row(fn, text: str, batch_size: int) -> float:
+    """Peak memory traced while parsing + normalizing, per row of one batch."""
+    f = io.StringIO(text)
+    tracemalloc.start()
+    fn(f, batch_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / batch_size
+
+
+def blocks_per_row(parse_batch, text: str, batch_size: int) -> float:
+    """Heap blocks kept alive by one parsed (not yet normalized) batch, per row."""
+    f = io.StringIO(text)
+    gc.collect()
+    before = sys.getallocatedblocks()
+    batch = parse_batch(f, batch_size)
+    after = sys.getallocatedblocks()
+    del batch
+    return (after - before) / batch_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_csv(args.rows)
+    assert run_legacy(io.StringIO(text), args.batch_size) == run_columns(
+        io.StringIO(text), args.batch_size
+    )
+
+    print(f"{args.rows} rows, batch size {args.batch_size}, {len(text) / 1e6:.1f} MB")
+    print(f"{'path':<10} {'rows/sec':>12} {'peak B/row':>12} {'blocks/row':>12}")
+    paths = (
+        ("dictreader", run_legacy, parse_legacy_batch),
+        ("columns", run_columns, parse_columns_batch),
+    )
+    for label, run, parse_batch in paths:
+        rate = rows_per_second(run, text, args.rows, args.batch_size, args.repeat)
+        peak = peak_bytes_per_row(run, text, args.batch_size)
+        blocks = blocks_per_row(parse_batch, text, args.batch_size)
+        print(f"{label:<10} {rate:>12,.0f} {peak:>12,.0f} {blocks:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
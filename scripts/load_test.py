@@ -0,0 +1,158 @@
+"""
+Load test: latency of the hot read endpoints under many concurrent clients.
+
+Each client is a thread with its own keep-alive session that requests the
+paths round-robin for --duration seconds. Run it once against a build with
+the sync handlers and once against the async ones, saving each run, then
+compare:
+
+    python scripts/load_test.py --base-url http://localhost:8000 --clients 300 \\
+        --duration 60 --upload-job 1 --save sync.json
+    python scripts/load_test.py ... --save async.json
+    python scripts/load_test.py --compare sync.json async.json
+
+Reports requests/sec, error count and p50/p95/p99 latency (ms) per path.
+Latencies include client-side queueing, so run the client on a separate
+machine from the server when the numbers matter.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+DEFAULT_PATHS = [
+    "/api/products?page_size=20",
+    "/api/products?cursor=&page_size=50&total=estimate",
+    "/api/products?q=shirt&page_size=20&total=none",
+    "/api/webhooks",
+]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_client(base_url: str, paths: list[str], offset: int, deadline: float, results: dict):
+    session = requests.Session()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if ok:
+            latencies[path].append(elapsed_ms)
+        else:
+            errors[path] += 1
+
+    with results["lock"]:
+        for path, values in latencies.items():
+            results["latencies"][path].extend(values)
+        for path, count in errors.items():
+            results["errors"][path] += count
+
+
+def run(base_url: str, paths: list[str], clients: int, duration: float) -> dict:
+    results = {
+        "lock": threading.Lock(),
+        "latencies": defaultdict(list),
+        "errors": defaultdict(int),
+    }
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=run_client, args=(base_url, paths, n, deadline, results))
+        for n in range(clients)
+    ]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    summary = {"clients": clients, "duration": round(elapsed, 1), "paths": {}}
+    for path in paths:
+        values = sorted(results["latencies"][path])
+        summary["paths"][path] = {
+            "requests": len(values),
+            "errors": results["errors"][path],
+            "rps": round(len(values) / elapsed, 1),
+            "p50": round(percentile(values, 50), 1),
+            "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1),
+            "mean": round(statistics.fmean(values), 1) if values else None,
+        }
+    return summary
+
+
+def print_summary(label: str, summary: dict):
+    print(f"{label}: {summary['clients']} clients, {summary['duration']}s")
+    print(f"  {'path':<55} {'req/s':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for path, s in summary["paths"].items():
+        print(
+            f"  {path:<55} {s['rps']:>8} {s['errors']:>7} "
+            f"{s['p50']:>8} {s['p95']:>8} {s['p99']:>8}"
+        )
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print_summary(before_path, before)
+    print_summary(after_path, after)
+    print("Change (after vs before):")
+    for path, b in before["paths"].items():
+        a = after["paths"].get(path)
+        if not a:
+            continue
+        parts = []
+        for key in ("rps", "p50", "p99"):
+            if b[key]:
+                parts.append(f"{key} {(a[key] - b[key]) / b[key] * 100:+.0f}%")
+        print(f"  {path:<55} {', '.join(parts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--path", action="append", help="Path to request (repeatable)")
+    parser.add_argument("--upload-job", type=int, help="Also poll /api/uploads/{id}")
+    parser.add_argument("--save", help="Write the summary to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    paths = args.path or list(DEFAULT_PATHS)
+    if args.upload_job is not None:
+        paths.append(f"/api/uploads/{args.upload_job}")
+
+    summary = run(args.base_url.rstrip("/"), paths, args.clients, args.duration)
+    print_summary(args.base_url, summary)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
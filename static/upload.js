@@ -1,6 +1,10 @@
 document.addEventListener("DOMContentLoaded", () => {
   const form = document.getElementById("upload-form");
   const fileInput = document.getElementById("file-input");
+  const loaderSelect = document.getElementById("loader-select");
+  const shardsInput = document.getElementById("shards-input");
+  const feedInput = document.getElementById("feed-input");
+  const deactivateMissingInput = document.getElementById("deactivate-missing-input");
   const uploadBtn = document.getElementById("upload-btn");
   const statusEl = document.getElementById("status");
   const progressContainer = document.getElementById("progress-container");
@@ -16,6 +20,62 @@ document.addEventListener("DOMContentLoaded", () => {
     statusEl.className = type || "";
   }
 
+  let eventSource = null;
+
+  function finish() {
+    if (pollTimer) {
+      clearInterval(pollTimer);
+      pollTimer = null;
+    }
+    if (eventSource) {
+      eventSource.close();
+      eventSource = null;
+    }
+    uploadBtn.disabled = false;
+    fileInput.disabled = false;
+  }
+
+  function renderProgress(data) {
+    const total = data.estimated_total_rows || data.total_rows || 0;
+    const processed = data.processed_rows || 0;
+    const status = data.status || "unknown";
+
+    statusText.textContent = status;
+
+    if (data.percentage !== null && data.percentage !== undefined) {
+      const pct = Math.round(data.percentage);
+      progressBar.value = pct;
+      let label = `${pct}% (${processed}/${total ? "~" + total : "?"} rows)`;
+      if (data.rows_per_second) {
+        label += ` · ${Math.round(data.rows_per_second)} rows/s`;
+      }
+      if (data.eta_seconds !== null && data.eta_seconds !== undefined) {
+        label += ` · ETA ${Math.ceil(data.eta_seconds)}s`;
+      }
+      progressLabel.textContent = label;
+    } else {
+      progressBar.value = 0;
+      progressLabel.textContent = `${processed} rows processed`;
+    }
+
+    if (status === "completed") {
+      finish();
+      let message = "Import completed successfully.";
+      if (data.inserted_rows !== null && data.inserted_rows !== undefined) {
+        message +=
+          ` ${data.inserted_rows} inserted, ${data.updated_rows} updated,` +
+          ` ${data.unchanged_rows} unchanged, ${data.skipped_rows} skipped.`;
+        if (data.deactivated_rows) {
+          message += ` ${data.deactivated_rows} deactivated.`;
+        }
+      }
+      setStatus(message, "success");
+    } else if (status === "failed") {
+      finish();
+      setStatus(data.error_message || "Import failed.", "error");
+    }
+  }
+
   function startPolling(jobId) {
     if (pollTimer) {
       clearInterval(pollTimer);
@@ -26,33 +86,7 @@ document.addEventListener("DOMContentLoaded", () => {
         if (!res.ok) {
           throw new Error(`Status check failed with ${res.status}`);
         }
-        const data = await res.json();
-        const total = data.total_rows || 0;
-        const processed = data.processed_rows || 0;
-        const status = data.status || "unknown";
-
-        statusText.textContent = status;
-
-        if (total > 0) {
-          const pct = Math.round((processed / total) * 100);
-          progressBar.value = pct;
-          progressLabel.textContent = `${pct}% (${processed}/${total})`;
-        } else {
-          progressBar.value = 0;
-          progressLabel.textContent = `${processed} rows processed`;
-        }
-
-        if (status === "completed") {
-          clearInterval(pollTimer);
-          setStatus("Import completed successfully.", "success");
-          uploadBtn.disabled = false;
-          fileInput.disabled = false;
-        } else if (status === "failed") {
-          clearInterval(pollTimer);
-          setStatus(data.error_message || "Import failed.", "error");
-          uploadBtn.disabled = false;
-          fileInput.disabled = false;
-        }
+        renderProgress(await res.json());
       } catch (err) {
         console.error(err);
         setStatus("Error checking upload status.", "error");
@@ -60,6 +94,27 @@ document.addEventListener("DOMContentLoaded", () => {
     }, 2000);
   }
 
+  // Progress is pushed over Server-Sent Events; fall back to polling if the
+  // browser or a proxy in between doesn't cooperate.
+  function watchJob(jobId) {
+    if (!window.EventSource) {
+      startPolling(jobId);
+      return;
+    }
+    eventSource = new EventSource(`/api/uploads/${jobId}/events`);
+    eventSource.addEventListener("progress", (event) => {
+      renderProgress(JSON.parse(event.data));
+    });
+    eventSource.onerror = () => {
+      if (!eventSource) {
+        return;
+      }
+      eventSource.close();
+      eventSource = null;
+      startPolling(jobId);
+    };
+  }
+
   form.addEventListener("submit", async (e) => {
     e.preventDefault();
     setStatus("", "");
@@ -70,6 +125,16 @@ document.addEventListener("DOMContentLoaded", () => {
 
     const formData = new FormData();
     formData.append("file", fileInput.files[0]);
+    if (loaderSelect) {
+      formData.append("loader", loaderSelect.value);
+    }
+    if (shardsInput && shardsInput.value) {
+      formData.append("shards", shardsInput.value);
+    }
+    if (feedInput && feedInput.value.trim()) {
+      formData.append("feed", feedInput.value.trim());
+      formData.append("deactivate_missing", deactivateMissingInput.checked ? "true" : "false");
+    }
 
     uploadBtn.disabled = true;
     fileInput.disabled = true;
@@ -94,7 +159,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
       setStatus("File uploaded, processing started.", "success");
       statusText.textContent = "running";
-      startPolling(currentJobId);
+      watchJob(currentJobId);
     } catch (err) {
       console.error(err);
       setStatus("Upload failed: " + err.message, "error");
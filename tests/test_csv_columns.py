@@ -0,0 +1,102 @@
+"""Header mapping and row normalization for CSV and NDJSON imports."""
+import pytest
+
+from app.csv_columns import (
+    ColumnBatch,
+    ColumnMapping,
+    iter_column_batches,
+    iter_ndjson_batches,
+    normalize_batch,
+)
+
+
+def _normalize(rows, header=("sku", "name", "description", "price")):
+    return normalize_batch(ColumnBatch([list(r) for r in rows], ColumnMapping(list(header))))
+
+
+def test_mapping_matches_aliases_case_insensitively():
+    mapping = ColumnMapping([" Product_SKU ", "TITLE", "unit_price"])
+    assert mapping.index == {"sku": 0, "name": 1, "description": None, "price": 2}
+    assert mapping.min_width == 3
+
+
+def test_mapping_first_matching_column_wins():
+    mapping = ColumnMapping(["sku", "name", "item_sku"])
+    assert mapping.index["sku"] == 0
+
+
+def test_mapping_requires_sku_and_name():
+    with pytest.raises(ValueError, match="name"):
+        ColumnMapping(["sku", "price"])
+
+
+def test_short_rows_are_padded():
+    batch = ColumnBatch([["a", "A"], ["b", "B", "desc", "1"]], ColumnMapping(
+        ["sku", "name", "description", "price"]
+    ))
+    assert batch.description == ["", "desc"]
+    assert batch.price == ["", "1"]
+
+
+def test_normalize_upper_cases_skus_and_keeps_last_duplicate():
+    values, skipped = _normalize([
+        (" ab-1 ", "First", "", "1"),
+        ("AB-1", "Second", "", "2"),
+    ])
+    assert skipped == 0
+    assert values == [{"sku": "AB-1", "name": "Second", "description": "", "price": "2"}]
+
+
+def test_normalize_skips_rows_without_sku_or_name():
+    values, skipped = _normalize([("", "Name", "", ""), ("A", " ", "", ""), ("B", "B", "", "")])
+    assert skipped == 2
+    assert [v["sku"] for v in values] == ["B"]
+
+
+@pytest.mark.parametrize("price", ["1", "+1", "-2.25", ".5", "5.", "99999999.99", "0000000012.5"])
+def test_normalize_keeps_plain_decimal_prices(price):
+    values, skipped = _normalize([("A", "A", "", f" {price} ")])
+    assert skipped == 0
+    assert values[0]["price"] == price
+
+
+@pytest.mark.parametrize("price", ["", "N/A", "NaN", "$5", ".", "1,5"])
+def test_normalize_nulls_non_numeric_prices(price):
+    values, skipped = _normalize([("A", "A", "", price)])
+    assert skipped == 0
+    assert values[0]["price"] is None
+
+
+@pytest.mark.parametrize("price", ["1e30", "1E2", "123456789", "-100000000", "99999999.995"])
+def test_normalize_skips_prices_outside_numeric_10_2(price):
+    values, skipped = _normalize([("A", "A", "", price), ("B", "B", "", "1")])
+    assert skipped == 1
+    assert [v["sku"] for v in values] == ["B"]
+
+
+def test_column_batches_drop_blank_lines_and_split_by_size():
+    mapping = ColumnMapping(["sku", "name"])
+    rows = [["a", "A"], [], ["b", "B"], ["c", "C"]]
+    batches = list(iter_column_batches(iter(rows), mapping, 2))
+    assert [b.sku for b in batches] == [["a", "b"], ["c"]]
+
+
+def test_ndjson_batches_map_keys_per_layout():
+    lines = [
+        '{"sku": "a", "name": "A", "price": 1.5}\n',
+        "\n",
+        '{"product_name": "B", "product_sku": "b", "price": null}\n',
+        '{"sku": "c"}\n',
+    ]
+    (batch,) = iter_ndjson_batches(lines, 10)
+    assert batch.sku == ["a", "b", "c"]
+    assert batch.name == ["A", "B", ""]
+    assert batch.price == ["1.5", "", ""]
+    values, skipped = normalize_batch(batch)
+    assert skipped == 1
+    assert len(values) == 2
+
+
+def test_ndjson_rejects_non_objects():
+    with pytest.raises(ValueError):
+        list(iter_ndjson_batches(["[1, 2]\n"], 10))
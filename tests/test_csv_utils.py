@@ -0,0 +1,87 @@
+"""Record counting, offset tracking and row-aligned splitting of CSV files."""
+import csv
+import io
+
+import pytest
+
+from app.csv_utils import CsvRecordCounter, OffsetLineReader, find_row_boundaries
+
+MULTILINE_CSV = (
+    b'sku,name,description\n'
+    b'a,A,"first line\nsecond line"\n'
+    b'b,B,"says ""hi""\n"\n'
+    b'c,C,plain\n'
+)
+
+
+def _count(data: bytes, chunk_size: int) -> CsvRecordCounter:
+    counter = CsvRecordCounter()
+    for i in range(0, len(data), chunk_size):
+        counter.feed(data[i:i + chunk_size])
+    return counter
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_counter_ignores_newlines_in_quotes(chunk_size):
+    counter = _count(MULTILINE_CSV, chunk_size)
+    assert counter.records == 4
+    assert counter.data_rows == 3
+    assert not counter.in_quotes
+
+
+def test_counter_counts_final_record_without_newline():
+    assert _count(b"sku,name\na,A\nb,B", 4).data_rows == 2
+
+
+def test_counter_empty_input():
+    counter = CsvRecordCounter()
+    counter.feed(b"")
+    assert counter.records == 0
+    assert counter.data_rows == 0
+
+
+def test_line_reader_offset_is_a_row_boundary():
+    raw = io.BytesIO(MULTILINE_CSV)
+    lines = OffsetLineReader(raw)
+    reader = csv.reader(lines)
+    next(reader)
+    next(reader)
+    boundary = lines.offset
+    assert MULTILINE_CSV[boundary:].startswith(b"b,B,")
+
+    resumed = OffsetLineReader(io.BytesIO(MULTILINE_CSV))
+    resumed.seek(boundary)
+    assert [row[0] for row in csv.reader(resumed)] == ["b", "c"]
+    assert resumed.offset == len(MULTILINE_CSV)
+
+
+def test_line_reader_strips_bom_and_stops_at_end():
+    data = b"\xef\xbb\xbfsku,name\na,A\nb,B\n"
+    lines = OffsetLineReader(io.BytesIO(data), end=len(b"\xef\xbb\xbfsku,name\n"))
+    assert list(lines) == ["sku,name\n"]
+
+
+def test_row_boundaries_never_split_quoted_fields(tmp_path):
+    header = b"sku,name,description\n"
+    rows = [b'r%d,R,"line one\nline two\nline three"\n' % i for i in range(50)]
+    path = tmp_path / "products.csv"
+    path.write_bytes(header + b"".join(rows))
+
+    row_starts = set()
+    pos = len(header)
+    for row in rows:
+        row_starts.add(pos)
+        pos += len(row)
+
+    for chunk_size in (5, 64, 1024 * 1024):
+        boundaries = find_row_boundaries(path, len(header), 4, chunk_size=chunk_size)
+        assert len(boundaries) == 3
+        assert boundaries == sorted(boundaries)
+        assert set(boundaries) <= row_starts
+
+
+def test_row_boundaries_single_part_or_empty_range(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_bytes(b"sku,name\na,A\n")
+    assert find_row_boundaries(path, 9, 1) == []
+    assert find_row_boundaries(path, path.stat().st_size, 4) == []
@@ -0,0 +1,34 @@
+"""Opaque keyset cursors for the product listing."""
+import pytest
+from fastapi import HTTPException
+
+from app.routers.products import _decode_cursor, _encode_cursor
+
+
+def test_round_trip_without_rank():
+    cursor = _encode_cursor(42)
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == {"after_id": 42}
+
+
+def test_round_trip_with_rank():
+    assert _decode_cursor(_encode_cursor(7, 0.25)) == {"after_id": 7, "rank": 0.25}
+
+
+def test_empty_cursor_is_first_page():
+    assert _decode_cursor("") is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "e30",  # {}
+        "WzFd",  # [1]
+        "eyJhZnRlcl9pZCI6ICJ4In0",  # {"after_id": "x"}
+    ],
+)
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        _decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,83 @@
+"""Format detection and resumable batch parsing of stored uploads."""
+import gzip
+import zipfile
+
+import pytest
+
+from app.upload_formats import detect_format, inspect_zip, iter_upload_batches, open_upload
+
+CSV = b"sku,name,price\na,A,1\nb,B,2\nc,C,3\nd,D,4\n"
+
+
+def _skus(path, file_format, compression=None, start=0):
+    with open_upload(path, compression) as (lines, _):
+        batches = iter_upload_batches(lines, file_format, 2, start=start)
+        return [sku for batch in batches for sku in batch.sku]
+
+
+def _boundary_after(data: bytes, line: int) -> int:
+    return len(b"".join(data.splitlines(keepends=True)[:line]))
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("Products.CSV", ("csv", None, ".csv")),
+        ("products.csv.gz", ("csv", "gzip", ".csv.gz")),
+        ("products.jsonl", ("ndjson", None, ".jsonl")),
+        ("products.zip", (None, "zip", ".zip")),
+    ],
+)
+def test_detect_format(filename, expected):
+    assert detect_format(filename) == expected
+
+
+def test_detect_format_rejects_unknown_extensions():
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        detect_format("products.xlsx")
+
+
+def test_inspect_zip_requires_one_supported_member(tmp_path):
+    path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("products.ndjson", b"")
+    assert inspect_zip(path) == "ndjson"
+
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.csv", b"")
+        archive.writestr("b.csv", b"")
+    with pytest.raises(ValueError, match="exactly one file"):
+        inspect_zip(path)
+
+
+def test_csv_resume_reads_header_then_continues_from_start(tmp_path):
+    path = tmp_path / "upload.csv"
+    path.write_bytes(CSV)
+    assert _skus(path, "csv") == ["a", "b", "c", "d"]
+    assert _skus(path, "csv", start=_boundary_after(CSV, 3)) == ["c", "d"]
+
+
+def test_csv_resume_at_header_end_reads_everything(tmp_path):
+    path = tmp_path / "upload.csv"
+    path.write_bytes(CSV)
+    assert _skus(path, "csv", start=_boundary_after(CSV, 1)) == ["a", "b", "c", "d"]
+
+
+def test_gzip_resume_uses_decompressed_offsets(tmp_path):
+    path = tmp_path / "upload.csv.gz"
+    path.write_bytes(gzip.compress(CSV))
+    assert _skus(path, "csv", "gzip", start=_boundary_after(CSV, 4)) == ["d"]
+
+
+def test_ndjson_resume(tmp_path):
+    data = b"".join(b'{"sku": "%s", "name": "N"}\n' % s for s in (b"a", b"b", b"c"))
+    path = tmp_path / "upload.ndjson"
+    path.write_bytes(data)
+    assert _skus(path, "ndjson") == ["a", "b", "c"]
+    assert _skus(path, "ndjson", start=_boundary_after(data, 2)) == ["c"]
+
+
+def test_empty_csv_has_no_batches(tmp_path):
+    path = tmp_path / "upload.csv"
+    path.write_bytes(b"")
+    assert _skus(path, "csv") == []
@@ -0,0 +1,81 @@
+"""Percentage, row estimate, throughput and ETA derived for an upload job."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.routers.uploads import _progress_stats
+
+NOW = datetime.now(timezone.utc)
+
+
+def _job(**fields):
+    defaults = {
+        "status": "importing",
+        "processed_rows": 0,
+        "processed_bytes": 0,
+        "file_size": 0,
+        "total_rows": None,
+        "started_at": None,
+        "finished_at": None,
+    }
+    return SimpleNamespace(**{**defaults, **fields})
+
+
+def test_pending_job_has_no_stats():
+    assert _progress_stats(_job(status="pending", file_size=1000)) == {
+        "percentage": 0.0,
+        "estimated_total_rows": None,
+        "rows_per_second": None,
+        "eta_seconds": None,
+    }
+
+
+def test_progress_and_eta_come_from_bytes_consumed():
+    stats = _progress_stats(_job(
+        processed_rows=250,
+        processed_bytes=2500,
+        file_size=10000,
+        started_at=NOW - timedelta(seconds=10),
+        finished_at=NOW,
+    ))
+    assert stats["percentage"] == 25.0
+    assert stats["estimated_total_rows"] == 1000
+    assert stats["rows_per_second"] == 25.0
+    assert stats["eta_seconds"] == 30.0
+
+
+def test_counted_total_rows_wins_over_the_estimate():
+    job = _job(processed_rows=10, processed_bytes=100, file_size=1000, total_rows=42)
+    stats = _progress_stats(job)
+    assert stats["estimated_total_rows"] == 42
+
+
+def test_rows_are_used_when_the_file_size_is_unknown():
+    stats = _progress_stats(_job(processed_rows=30, total_rows=120))
+    assert stats["percentage"] == 25.0
+
+
+def test_naive_timestamps_are_treated_as_utc():
+    started = (NOW - timedelta(seconds=4)).replace(tzinfo=None)
+    stats = _progress_stats(_job(
+        processed_rows=100,
+        processed_bytes=100,
+        file_size=200,
+        started_at=started,
+        finished_at=NOW.replace(tzinfo=None),
+    ))
+    assert stats["rows_per_second"] == 25.0
+    assert stats["eta_seconds"] == 4.0
+
+
+def test_completed_job_is_100_percent_without_an_eta():
+    stats = _progress_stats(_job(
+        status="completed",
+        processed_rows=100,
+        processed_bytes=900,
+        file_size=1000,
+        started_at=NOW - timedelta(seconds=2),
+        finished_at=NOW,
+    ))
+    assert stats["percentage"] == 100.0
+    assert stats["eta_seconds"] is None
+    assert stats["rows_per_second"] == 50.0
@@ -0,0 +1,97 @@
+"""Collapsing buffered events for batching webhooks, against an in-memory Redis."""
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app import webhook_batching
+from app.webhook_batching import add_to_batch, collapse_key, take_batch
+
+
+class FakePipeline:
+    """The few Redis hash/string commands webhook_batching uses."""
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        results = [getattr(self, f"_{name}")(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+    def _hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+        return 1
+
+    def _expire(self, key, ttl):
+        return key in self.data
+
+    def _hlen(self, key):
+        return len(self.data.get(key, {}))
+
+    def _set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    data: dict = {}
+
+    class FakeRedis:
+        def pipeline(self):
+            return FakePipeline(data)
+
+    monkeypatch.setattr(webhook_batching, "redis_client", FakeRedis())
+    # Strictly increasing timestamps, however coarse the real clock is
+    monkeypatch.setattr(webhook_batching, "time", SimpleNamespace(time=itertools.count().__next__))
+    return data
+
+
+def test_collapse_key_uses_product_id():
+    assert collapse_key({"id": 5, "name": "a"}) == collapse_key({"id": 5, "name": "b"})
+    assert collapse_key({"name": "a"}) != collapse_key({"name": "a"})
+    assert collapse_key(["not", "a", "dict"]).startswith("event:")
+
+
+def test_later_events_for_a_product_replace_earlier_ones(fake_redis):
+    assert add_to_batch(1, "product.updated", {"id": 1, "price": "1"}, 60) == (1, True)
+    assert add_to_batch(1, "product.updated", {"id": 2, "price": "5"}, 60) == (2, False)
+    assert add_to_batch(1, "product.updated", {"id": 1, "price": "2"}, 60) == (2, False)
+
+    assert take_batch(1, "product.updated") == [
+        {"id": 2, "price": "5"},
+        {"id": 1, "price": "2"},
+    ]
+
+
+def test_events_without_an_id_are_all_kept(fake_redis):
+    add_to_batch(1, "products.deleted", {"count": 3}, 60)
+    add_to_batch(1, "products.deleted", {"count": 3}, 60)
+    assert len(take_batch(1, "products.deleted")) == 2
+
+
+def test_take_batch_empties_the_buffer_and_reopens_the_window(fake_redis):
+    add_to_batch(1, "product.updated", {"id": 1}, 60)
+    take_batch(1, "product.updated")
+    assert take_batch(1, "product.updated") == []
+    assert add_to_batch(1, "product.updated", {"id": 1}, 60) == (1, True)
+
+
+def test_batches_are_kept_per_webhook(fake_redis):
+    add_to_batch(1, "product.updated", {"id": 1}, 60)
+    add_to_batch(2, "product.updated", {"id": 1}, 60)
+    assert take_batch(1, "product.updated") == [{"id": 1}]
+    assert take_batch(2, "product.updated") == [{"id": 1}]
@@ -0,0 +1,106 @@
+"""Per-endpoint circuit breaker gating and retry backoff, without Redis."""
+import time
+
+import pytest
+import redis
+
+from app import webhook_breaker
+from app.webhook_breaker import CLOSED, HALF_OPEN, OPEN, backoff_delay, endpoint_of, gate
+
+
+def _delivery(url, n=0):
+    return {"webhook_id": n, "url": url, "event_type": "product.updated", "payload": {}}
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """Breaker state per endpoint, and the endpoints that got a probe claim."""
+    states: dict[str, dict] = {}
+    claims: list[str] = []
+
+    def fetch(endpoints):
+        return [states.get(e, {}) for e in endpoints]
+
+    def claim_probe(endpoint):
+        claims.append(endpoint)
+        return claims.count(endpoint) == 1
+
+    monkeypatch.setattr(webhook_breaker, "_fetch", fetch)
+    monkeypatch.setattr(webhook_breaker, "_claim_probe", claim_probe)
+    return states, claims
+
+
+def test_endpoint_ignores_path_and_case():
+    assert endpoint_of(" HTTPS://Hooks.Example.com:8443/a?b=1 ") == "https://hooks.example.com:8443"
+    assert endpoint_of("http://example.com/x") != endpoint_of("https://example.com/x")
+
+
+def test_closed_circuit_lets_everything_through(breaker):
+    deliveries = [_delivery("http://a.test/1"), _delivery("http://a.test/2")]
+    assert gate(deliveries) == (deliveries, [])
+
+
+def test_open_circuit_parks_until_cooldown_ends(breaker):
+    states, _ = breaker
+    states["http://down.test"] = {
+        "state": OPEN,
+        "failures": "5",
+        "open_until": str(time.time() + 30),
+    }
+    up, down = _delivery("http://up.test/x"), _delivery("http://down.test/hook")
+
+    allowed, parked = gate([up, down])
+    assert allowed == [up]
+    ((item, wait),) = parked
+    assert item is down
+    assert 0 < wait <= 30
+
+
+def test_open_circuit_is_shared_by_webhooks_on_one_endpoint(breaker):
+    states, _ = breaker
+    states["http://down.test"] = {"state": OPEN, "open_until": str(time.time() + 30)}
+    deliveries = [_delivery("http://DOWN.test/a", 1), _delivery("http://down.test/b", 2)]
+    allowed, parked = gate(deliveries)
+    assert allowed == []
+    assert [d for d, _ in parked] == deliveries
+
+
+def test_half_open_circuit_sends_exactly_one_probe(breaker):
+    states, claims = breaker
+    states["http://flaky.test"] = {"state": OPEN, "open_until": str(time.time() - 1)}
+    deliveries = [_delivery("http://flaky.test/hook", n) for n in range(3)]
+
+    allowed, parked = gate(deliveries)
+    assert allowed == deliveries[:1]
+    assert [d for d, _ in parked] == deliveries[1:]
+    assert claims == ["http://flaky.test"]
+
+    # Another worker's gate, while the probe is still out
+    allowed, parked = gate(deliveries[1:])
+    assert allowed == []
+    assert len(parked) == 2
+
+
+def test_redis_outage_lets_everything_through(monkeypatch):
+    def fetch(endpoints):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(webhook_breaker, "_fetch", fetch)
+    deliveries = [_delivery("http://a.test/")]
+    assert gate(deliveries) == (deliveries, [])
+
+
+def test_describe_turns_expired_open_into_half_open():
+    now = time.time()
+    assert webhook_breaker._describe({}, now)["state"] == CLOSED
+    info = webhook_breaker._describe({"state": OPEN, "open_until": str(now - 1)}, now)
+    assert info["state"] == HALF_OPEN
+    assert info["open_until"] is None
+
+
+def test_backoff_grows_exponentially_with_jitter_and_a_cap(monkeypatch):
+    monkeypatch.setattr(webhook_breaker, "WEBHOOK_RETRY_BASE_DELAY", 2.0)
+    monkeypatch.setattr(webhook_breaker, "WEBHOOK_RETRY_MAX_DELAY", 30.0)
+    for attempt, full in [(1, 2.0), (2, 4.0), (4, 16.0), (5, 30.0), (20, 30.0)]:
+        for _ in range(20):
+            assert full * 0.5 <= backoff_delay(attempt) <= full
@@ -0,0 +1,66 @@
+"""Per-host queueing in the webhook DeliveryEngine, without network access."""
+import threading
+import time
+
+from app.webhook_delivery import DeliveryEngine
+
+
+class SlowHostEngine(DeliveryEngine):
+    """Records concurrency per host; deliveries to slow.test take a while."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.finished: dict[str, float] = {}
+        self.counter_lock = threading.Lock()
+
+    def deliver(self, delivery):
+        host = delivery["url"].split("/")[2]
+        with self.counter_lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(0.2 if host == "slow.test" else 0.01)
+        with self.counter_lock:
+            self.active[host] -= 1
+            self.finished[delivery["url"]] = time.monotonic()
+        if delivery["payload"] == "boom":
+            raise RuntimeError("boom")
+        return {**delivery, "status_code": 200, "duration_ms": 0, "error": None}
+
+
+def _delivery(url, payload=None):
+    return {"webhook_id": 1, "url": url, "event_type": "product.updated", "payload": payload}
+
+
+def test_per_host_limit_queues_instead_of_blocking_other_hosts():
+    engine = SlowHostEngine(max_concurrency=4, per_host_concurrency=2)
+    slow = [_delivery(f"http://slow.test/{i}") for i in range(6)]
+    fast = [_delivery(f"http://fast.test/{i}") for i in range(4)]
+
+    start = time.monotonic()
+    results = engine.deliver_many(slow + fast)
+
+    assert [r["url"] for r in results] == [d["url"] for d in slow + fast]
+    assert engine.peak == {"slow.test": 2, "fast.test": 2}
+    # Queued slow deliveries hold no pool threads, so fast.test isn't stuck behind them
+    assert max(engine.finished[d["url"]] for d in fast) - start < 0.2
+    assert engine._in_flight == {}
+    assert engine._waiting == {}
+
+
+def test_a_failing_delivery_frees_its_host_slot():
+    engine = SlowHostEngine(max_concurrency=2, per_host_concurrency=1)
+    deliveries = [_delivery("http://fast.test/0", "boom"), _delivery("http://fast.test/1")]
+    futures = [engine._submit(d) for d in deliveries]
+
+    assert isinstance(futures[0].exception(timeout=5), RuntimeError)
+    assert futures[1].result(timeout=5)["status_code"] == 200
+    assert engine._in_flight == {}
+
+
+def test_deliver_turns_any_exception_into_an_error_result():
+    engine = DeliveryEngine(max_concurrency=1, per_host_concurrency=1, timeout=0.1)
+    result = engine.deliver(_delivery("http://example.test/", payload=object()))
+    assert result["status_code"] is None
+    assert "TypeError" in result["error"]